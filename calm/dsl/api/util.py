@@ -1,24 +1,40 @@
-import copy
 import json
 import sys
 import os
 
+from collections import deque
+
 from calm.dsl.log import get_logging_handle
 from calm.dsl.config import get_context
 from calm.dsl.constants import DSL_CONFIG
 
 LOG = get_logging_handle(__name__)
 
+# Path fragments repeated across secret paths and contexts, interned once so
+# hashing and equality on them stay pointer-fast in the trie and maps below
+_ACTION_LIST = sys.intern("action_list")
+_ATTRS = sys.intern("attrs")
+_AUTHENTICATION = sys.intern("authentication")
+_BASIC_AUTH = sys.intern("basic_auth")
+_OPTIONS = sys.intern("options")
+_PASSWORD = sys.intern("password")
+_RUNBOOK = sys.intern("runbook")
+_TASK_DEFINITION_LIST = sys.intern("task_definition_list")
+
+# Server-populated attributes stripped from patch config runbooks before they
+# are re-attached to the spec payload
+_RUNBOOK_STRIP_FIELDS = ("state", "message_list")
+
 
 def get_secrets_from_context(decompiled_secrets, context):
     """Finds all the secrets by context of the current secret"""
 
-    filtered_secrets = dict()
-
+    # Callers only read the returned dict, so return a direct reference
+    # instead of deep-copying it on every lookup
     if context in decompiled_secrets:
-        filtered_secrets = copy.deepcopy(decompiled_secrets.get(context, {}))
+        return decompiled_secrets[context]
 
-    return filtered_secrets
+    return dict()
 
 
 def is_secret_modified(filtered_secrets, name, value):
@@ -40,343 +56,414 @@ def is_secret_modified(filtered_secrets, name, value):
     return False
 
 
-def strip_secrets(
-    resources,
-    secret_map,
-    secret_variables,
-    object_lists=[],
-    objects=[],
-    decompiled_secrets=[],
-    not_stripped_secrets=[],
-):
-    """
-    Strips secrets from the resources
-    Args:
-        resources (dict): request payload
-        secret_map (dict): credential secret values
-        secret_variables (list): list of secret variables
-    Returns: None
-    """
+class _SecretStripContext:
+    """Shared state threaded through the module-level secret-strip helpers"""
 
-    # Remove creds before upload
-    creds = resources.get("credential_definition_list", []) or []
-    filtered_decompiled_secret_credentials = get_secrets_from_context(
-        decompiled_secrets, "credential_definition_list"
+    __slots__ = (
+        "secret_variables",
+        "not_stripped_secrets",
+        "decompiled_secrets",
+        "cached_context_secrets",
     )
 
-    default_creds = []
-    for cred in creds:
-        name = cred["name"]
-        value = cred["secret"]["value"]
+    def __init__(self, secret_variables, not_stripped_secrets, decompiled_secrets):
+        self.secret_variables = secret_variables
+        self.not_stripped_secrets = not_stripped_secrets
+        self.decompiled_secrets = decompiled_secrets
+        # Per-invocation cache, as sibling entities often resolve to the same context
+        self.cached_context_secrets = {}
+
+    def get_secrets_from_context(self, context):
+        filtered_secrets = self.cached_context_secrets.get(context)
+        if filtered_secrets is None:
+            filtered_secrets = get_secrets_from_context(
+                self.decompiled_secrets, context
+            )
+            self.cached_context_secrets[context] = filtered_secrets
+        return filtered_secrets
 
-        if is_secret_modified(filtered_decompiled_secret_credentials, name, value):
-            secret_map[name] = cred.pop("secret", {})
-            # Explicitly set defaults so that secret is not created at server
-            # TODO - Fix bug in server: {} != None
-            cred["secret"] = {
-                "attrs": {"is_secret_modified": False, "secret_reference": None}
+
+def _strip_entity_secret_variables(
+    ctx, path_list, obj, field_name="variable_list", context=""
+):
+
+    # Skip the context build and secret lookup when there is nothing to
+    # iterate, which is the common case for non-HTTP tasks
+    variables = obj.get(field_name) or []
+    if not variables:
+        return
+
+    if field_name != "headers" and obj.get("name", None):
+        context = context + "." + obj["name"] + "." + field_name
+
+    filtered_decompiled_secrets = ctx.get_secrets_from_context(context)
+
+    for var_idx, variable in enumerate(variables):
+        if variable["type"] == "SECRET":
+            if is_secret_modified(
+                filtered_decompiled_secrets,
+                variable.get("name", None),
+                variable.get("value", None),
+            ):
+                ctx.secret_variables.append(
+                    (
+                        path_list + [field_name, var_idx],
+                        variable.pop("value"),
+                        variable.get("name", None),
+                    )
+                )
+                variable["attrs"] = {
+                    "is_secret_modified": False,
+                    "secret_reference": None,
+                }
+            elif variable.get("value", None):
+                ctx.not_stripped_secrets.append(
+                    (path_list + [field_name, var_idx], variable["value"])
+                )
+        # For dynamic variables having http task with auth
+        opts = variable.get(_OPTIONS, None)
+        auth = None
+        if opts:
+            attrs = opts.get(_ATTRS, None)
+            if attrs:
+                auth = attrs.get(_AUTHENTICATION, None)
+        if auth and auth.get("auth_type") == "basic":
+            basic_auth = auth.get("basic_auth")
+            username = basic_auth.get("username")
+            password = basic_auth.get(_PASSWORD)
+            # Build the long options path only when there is a password to strip
+            if password is None:
+                continue
+            ctx.secret_variables.append(
+                (
+                    path_list
+                    + [
+                        field_name,
+                        var_idx,
+                        _OPTIONS,
+                        _ATTRS,
+                        _AUTHENTICATION,
+                        _BASIC_AUTH,
+                        _PASSWORD,
+                    ],
+                    password.get("value", None),
+                    username,
+                )
+            )
+            basic_auth["password"] = {
+                "value": None,
+                "attrs": {"is_secret_modified": False},
             }
 
-    filtered_decompiled_secret_auth_creds = get_secrets_from_context(
-        decompiled_secrets, "authentication"
-    )
 
-    # Remove creds from HTTP endpoints resources
-    auth = resources.get("authentication", {}) or {}
-    if auth.get("type", None) == "basic":
-        if is_secret_modified(
-            filtered_decompiled_secret_auth_creds, auth["username"], auth["password"]
-        ):
-            name = auth["username"]
-            secret_map[name] = auth.pop("password", {})
-            auth["password"] = {"attrs": {"is_secret_modified": False, "value": None}}
+def _strip_action_secret_variables(ctx, path_list, obj):
 
-    # Strip secret variable values
-    # TODO: Refactor and/or clean this up later
+    context = path_list[0] + "." + obj["name"] + ".action_list"
 
-    def strip_entity_secret_variables(
-        path_list, obj, field_name="variable_list", context=""
-    ):
+    for action_idx, action in enumerate(obj.get("action_list", []) or []):
+        var_context = context + "." + action["name"]
+        runbook = action.get("runbook", {}) or {}
+        var_runbook_context = var_context + ".runbook"
 
-        if field_name != "headers" and obj.get("name", None):
-            context = context + "." + obj["name"] + "." + field_name
+        if not runbook:
+            continue
 
-        filtered_decompiled_secrets = get_secrets_from_context(
-            decompiled_secrets, context
+        # Invariant path prefixes, computed once per action/task instead
+        # of being rebuilt for every append below
+        runbook_path = path_list + [_ACTION_LIST, action_idx, _RUNBOOK]
+        _strip_entity_secret_variables(
+            ctx,
+            runbook_path,
+            runbook,
+            context=var_runbook_context,
         )
 
-        for var_idx, variable in enumerate(obj.get(field_name, []) or []):
-            if variable["type"] == "SECRET":
+        tasks = runbook.get(_TASK_DEFINITION_LIST, [])
+
+        var_runbook_task_context = (
+            var_runbook_context + "." + runbook["name"] + ".task_definition_list"
+        )
+
+        for task_idx, task in enumerate(tasks):
+            if task.get("type", None) != "HTTP":
+                continue
+
+            # Bind the nested dicts once per task instead of rebuilding
+            # the .get chains in every condition below
+            attrs = task.get("attrs") or {}
+            auth = attrs.get("authentication") or {}
+            basic_auth = auth.get("basic_auth") or {}
+
+            task_attrs_path = runbook_path + [
+                _TASK_DEFINITION_LIST,
+                task_idx,
+                _ATTRS,
+            ]
+
+            var_runbook_task_name_context = (
+                var_runbook_task_context + "." + task["name"]
+            )
+
+            var_runbook_task_name_basic_auth_context = (
+                var_runbook_task_context + "." + task["name"] + ".basic_auth"
+            )
+
+            if auth.get("auth_type", None) == "basic":
+
+                filtered_decompiled_secrets = ctx.get_secrets_from_context(
+                    var_runbook_task_name_basic_auth_context
+                )
+
                 if is_secret_modified(
                     filtered_decompiled_secrets,
-                    variable.get("name", None),
-                    variable.get("value", None),
+                    basic_auth.get("username", None),
+                    (basic_auth.get("password") or {}).get("value", None),
                 ):
-                    secret_variables.append(
+                    # The whole password dict is replaced below, so a plain
+                    # get suffices to capture the value - no need to pop first
+                    ctx.secret_variables.append(
                         (
-                            path_list + [field_name, var_idx],
-                            variable.pop("value"),
-                            variable.get("name", None),
+                            task_attrs_path + [_AUTHENTICATION, _BASIC_AUTH, _PASSWORD],
+                            basic_auth["password"].get("value"),
+                            basic_auth.get("username", None),
                         )
                     )
-                    variable["attrs"] = {
-                        "is_secret_modified": False,
-                        "secret_reference": None,
+                    basic_auth["password"] = {
+                        "attrs": {
+                            "is_secret_modified": False,
+                            "secret_reference": None,
+                        }
                     }
-                elif variable.get("value", None):
-                    not_stripped_secrets.append(
-                        (path_list + [field_name, var_idx], variable["value"])
-                    )
-            # For dynamic variables having http task with auth
-            opts = variable.get("options", None)
-            auth = None
-            if opts:
-                attrs = opts.get("attrs", None)
-                if attrs:
-                    auth = attrs.get("authentication", None)
-            if auth and auth.get("auth_type") == "basic":
-                basic_auth = auth.get("basic_auth")
-                username = basic_auth.get("username")
-                password = basic_auth.pop("password")
-                secret_variables.append(
-                    (
-                        path_list
-                        + [
-                            field_name,
-                            var_idx,
-                            "options",
-                            "attrs",
-                            "authentication",
-                            "basic_auth",
-                            "password",
-                        ],
-                        password.get("value", None),
-                        username,
+                elif basic_auth["password"].get("value", None):
+                    ctx.not_stripped_secrets.append(
+                        (
+                            task_attrs_path + [_AUTHENTICATION, _BASIC_AUTH, _PASSWORD],
+                            basic_auth["password"]["value"],
+                        )
                     )
-                )
-                basic_auth["password"] = {
-                    "value": None,
-                    "attrs": {"is_secret_modified": False},
-                }
-
-    def strip_action_secret_variables(path_list, obj):
 
-        context = path_list[0] + "." + obj["name"] + ".action_list"
+            if attrs.get("headers", []) or []:
+                _strip_entity_secret_variables(
+                    ctx,
+                    task_attrs_path,
+                    task["attrs"],
+                    field_name="headers",
+                    context=var_runbook_task_name_context + ".headers",
+                )
 
-        for action_idx, action in enumerate(obj.get("action_list", []) or []):
-            var_context = context + "." + action["name"]
-            runbook = action.get("runbook", {}) or {}
-            var_runbook_context = var_context + ".runbook"
 
-            if not runbook:
-                return
-            strip_entity_secret_variables(
-                path_list + ["action_list", action_idx, "runbook"],
-                runbook,
-                context=var_runbook_context,
-            )
+def _strip_runbook_secret_variables(ctx, path_list, obj):
 
-            tasks = runbook.get("task_definition_list", [])
+    context = path_list[0] + "." + obj["name"] + ".task_definition_list"
 
-            var_runbook_task_context = (
-                var_runbook_context + "." + runbook["name"] + ".task_definition_list"
+    tasks = obj.get(_TASK_DEFINITION_LIST, [])
+    for task_idx, task in enumerate(tasks):
+        # Derive each task's path from the caller's path_list instead of
+        # reassigning it, which needed a defensive deepcopy per call
+        if task.get("type", None) == "RT_OPERATION":
+            task_attrs_path = path_list + [
+                _TASK_DEFINITION_LIST,
+                task_idx,
+                _ATTRS,
+            ]
+            _strip_entity_secret_variables(
+                ctx, task_attrs_path, task["attrs"], field_name="inarg_list"
             )
+            continue
+        elif task.get("type", None) != "HTTP":
+            continue
+        attrs = task.get("attrs") or {}
+        auth = attrs.get("authentication") or {}
+        if auth.get("auth_type", None) == "basic":
+            task_attrs_path = path_list + [
+                _RUNBOOK,
+                _TASK_DEFINITION_LIST,
+                task_idx,
+                _ATTRS,
+            ]
+        else:
+            task_attrs_path = path_list + [
+                _TASK_DEFINITION_LIST,
+                task_idx,
+                _ATTRS,
+            ]
+        var_task_context = context + "." + task["name"]
 
-            for task_idx, task in enumerate(tasks):
-                if task.get("type", None) != "HTTP":
-                    continue
-                auth = (task.get("attrs", {}) or {}).get("authentication", {}) or {}
+        _strip_authentication_secret_variables(
+            ctx, task_attrs_path, attrs, context=var_task_context
+        )
 
-                var_runbook_task_name_context = (
-                    var_runbook_task_context + "." + task["name"]
-                )
+        if not attrs.get("headers", []) or []:
+            continue
+        _strip_entity_secret_variables(
+            ctx,
+            task_attrs_path,
+            task["attrs"],
+            field_name="headers",
+            context=var_task_context + ".headers",
+        )
 
-                var_runbook_task_name_basic_auth_context = (
-                    var_runbook_task_context + "." + task["name"] + ".basic_auth"
-                )
 
-                if auth.get("auth_type", None) == "basic":
+def _strip_authentication_secret_variables(ctx, path_list, obj, context=""):
 
-                    filtered_decompiled_secrets = get_secrets_from_context(
-                        decompiled_secrets, var_runbook_task_name_basic_auth_context
-                    )
+    basic_auth_context = context + "." + obj.get("name", "") + ".basic_auth"
 
-                    if is_secret_modified(
-                        filtered_decompiled_secrets,
-                        auth.get("basic_auth", {}).get("username", None),
-                        auth.get("basic_auth", {})
-                        .get("password", {})
-                        .get("value", None),
-                    ):
-                        secret_variables.append(
-                            (
-                                path_list
-                                + [
-                                    "action_list",
-                                    action_idx,
-                                    "runbook",
-                                    "task_definition_list",
-                                    task_idx,
-                                    "attrs",
-                                    "authentication",
-                                    "basic_auth",
-                                    "password",
-                                ],
-                                auth["basic_auth"]["password"].pop("value"),
-                                auth.get("basic_auth", {}).get("username", None),
-                            )
-                        )
-                        auth["basic_auth"]["password"] = {
-                            "attrs": {
-                                "is_secret_modified": False,
-                                "secret_reference": None,
-                            }
-                        }
-                    elif (
-                        auth.get("basic_auth", None)
-                        .get("password", None)
-                        .get("value", None)
-                    ):
-                        not_stripped_secrets.append(
-                            (
-                                path_list
-                                + [
-                                    "action_list",
-                                    action_idx,
-                                    "runbook",
-                                    "task_definition_list",
-                                    task_idx,
-                                    "attrs",
-                                    "authentication",
-                                    "basic_auth",
-                                    "password",
-                                ],
-                                auth["basic_auth"]["password"]["value"],
-                            )
-                        )
+    filtered_decompiled_secrets = ctx.get_secrets_from_context(basic_auth_context)
 
-                http_task_headers = (task.get("attrs", {}) or {}).get(
-                    "headers", []
-                ) or []
-                if http_task_headers:
-                    strip_entity_secret_variables(
-                        path_list
-                        + [
-                            "action_list",
-                            action_idx,
-                            "runbook",
-                            "task_definition_list",
-                            task_idx,
-                            "attrs",
-                        ],
-                        task["attrs"],
-                        field_name="headers",
-                        context=var_runbook_task_name_context + ".headers",
-                    )
+    auth = obj.get(_AUTHENTICATION, {})
+    if auth.get("auth_type", None) == "basic":
 
-    def strip_runbook_secret_variables(path_list, obj):
+        password = auth.get(_PASSWORD) or {}
+        if is_secret_modified(
+            filtered_decompiled_secrets,
+            password.get("name", None),
+            password.get("value", None),
+        ):
+            # The whole password dict is replaced below, so a plain get
+            # suffices to capture the value - no need to pop first
+            ctx.secret_variables.append(
+                (
+                    path_list + [_AUTHENTICATION, _BASIC_AUTH, _PASSWORD],
+                    password.get("value"),
+                    password.get("name", None),
+                )
+            )
+            auth["password"] = {"attrs": {"is_secret_modified": False}}
+        elif password.get("value", None):
+            ctx.not_stripped_secrets.append(
+                (
+                    path_list + [_AUTHENTICATION, _BASIC_AUTH, _PASSWORD],
+                    password["value"],
+                )
+            )
 
-        context = path_list[0] + "." + obj["name"] + ".task_definition_list"
 
-        tasks = obj.get("task_definition_list", [])
-        original_path_list = copy.deepcopy(path_list)
-        for task_idx, task in enumerate(tasks):
-            path_list = original_path_list
-            if task.get("type", None) == "RT_OPERATION":
-                path_list = path_list + [
-                    "task_definition_list",
-                    task_idx,
-                    "attrs",
-                ]
-                strip_entity_secret_variables(
-                    path_list, task["attrs"], field_name="inarg_list"
-                )
-                continue
-            elif task.get("type", None) != "HTTP":
-                continue
-            auth = (task.get("attrs", {}) or {}).get("authentication", {}) or {}
-            if auth.get("auth_type", None) == "basic":
-                path_list = path_list + ["runbook"]
+# Per-kind handlers for the iterative walk in _strip_all_secret_variables
+_SECRET_STRIP_HANDLERS = {
+    "variable_list": lambda ctx, path_list, obj, context: (
+        _strip_entity_secret_variables(ctx, path_list, obj, context=context)
+    ),
+    "action_list": lambda ctx, path_list, obj, context: (
+        _strip_action_secret_variables(ctx, path_list, obj)
+    ),
+    "task_definition_list": lambda ctx, path_list, obj, context: (
+        _strip_runbook_secret_variables(ctx, path_list, obj)
+    ),
+    "authentication": lambda ctx, path_list, obj, context: (
+        _strip_authentication_secret_variables(ctx, path_list, obj, context=context)
+    ),
+}
+
+
+def _strip_all_secret_variables(ctx, path_list, obj):
+    # Iterative walk: queue one work item per traversal kind and dispatch
+    # through the handler table instead of chaining dedicated call frames
+    work_queue = deque(
+        (kind, path_list, obj, path_list[0]) for kind in _SECRET_STRIP_HANDLERS
+    )
+    while work_queue:
+        kind, item_path_list, item, item_context = work_queue.popleft()
+        _SECRET_STRIP_HANDLERS[kind](ctx, item_path_list, item, item_context)
 
-            path_list = path_list + [
-                "task_definition_list",
-                task_idx,
-                "attrs",
-            ]
-            var_task_context = context + "." + task["name"]
 
-            strip_authentication_secret_variables(
-                path_list, task.get("attrs", {}) or {}, context=var_task_context
-            )
+def strip_secrets(
+    resources,
+    secret_map,
+    secret_variables,
+    object_lists=None,
+    objects=None,
+    decompiled_secrets=None,
+    not_stripped_secrets=None,
+):
+    """
+    Strips secrets from the resources
+    Args:
+        resources (dict): request payload
+        secret_map (dict): credential secret values
+        secret_variables (list): list of secret variables
+    Returns: None
+    """
 
-            if not (task.get("attrs", {}) or {}).get("headers", []) or []:
-                continue
-            strip_entity_secret_variables(
-                path_list,
-                task["attrs"],
-                field_name="headers",
-                context=var_task_context + ".headers",
-            )
+    # None sentinels instead of shared mutable defaults
+    object_lists = object_lists or ()
+    objects = objects or ()
+    if decompiled_secrets is None:
+        decompiled_secrets = {}
+    if not_stripped_secrets is None:
+        not_stripped_secrets = []
 
-    def strip_authentication_secret_variables(path_list, obj, context=""):
+    ctx = _SecretStripContext(
+        secret_variables, not_stripped_secrets, decompiled_secrets
+    )
 
-        basic_auth_context = context + "." + obj.get("name", "") + ".basic_auth"
+    # Remove creds before upload
+    creds = resources.get("credential_definition_list", []) or []
+    filtered_decompiled_secret_credentials = ctx.get_secrets_from_context(
+        "credential_definition_list"
+    )
 
-        filtered_decompiled_secrets = get_secrets_from_context(
-            decompiled_secrets, basic_auth_context
-        )
+    default_creds = []
+    for cred in creds:
+        name = cred["name"]
+        value = cred["secret"]["value"]
 
-        auth = obj.get("authentication", {})
-        if auth.get("auth_type", None) == "basic":
+        if is_secret_modified(filtered_decompiled_secret_credentials, name, value):
+            secret_map[name] = cred.pop("secret", {})
+            # Explicitly set defaults so that secret is not created at server
+            # TODO - Fix bug in server: {} != None
+            cred["secret"] = {
+                "attrs": {"is_secret_modified": False, "secret_reference": None}
+            }
 
-            if is_secret_modified(
-                filtered_decompiled_secrets,
-                auth.get("password", {}).get("name", None),
-                auth.get("password", {}).get("value", None),
-            ):
-                secret_variables.append(
-                    (
-                        path_list + ["authentication", "basic_auth", "password"],
-                        auth["password"].pop("value"),
-                        auth.get("password", {}).get("name", None),
-                    )
-                )
-                auth["password"] = {"attrs": {"is_secret_modified": False}}
-            elif auth.get("password", None).get("value", None):
-                not_stripped_secrets.append(
-                    (
-                        path_list + ["authentication", "basic_auth", "password"],
-                        auth["password"]["value"],
-                    )
-                )
+    filtered_decompiled_secret_auth_creds = ctx.get_secrets_from_context(
+        "authentication"
+    )
 
-    def strip_all_secret_variables(path_list, obj):
-        strip_entity_secret_variables(path_list, obj, context=path_list[0])
-        strip_action_secret_variables(path_list, obj)
-        strip_runbook_secret_variables(path_list, obj)
-        strip_authentication_secret_variables(path_list, obj, context=path_list[0])
+    # Remove creds from HTTP endpoints resources
+    auth = resources.get(_AUTHENTICATION, {}) or {}
+    if auth.get("type", None) == "basic":
+        if is_secret_modified(
+            filtered_decompiled_secret_auth_creds, auth["username"], auth["password"]
+        ):
+            name = auth["username"]
+            secret_map[name] = auth.pop(_PASSWORD, {})
+            auth["password"] = {"attrs": {"is_secret_modified": False, "value": None}}
 
+    # Strip secret variable values
     for object_list in object_lists:
         for obj_idx, obj in enumerate(resources.get(object_list, []) or []):
-            strip_all_secret_variables([object_list, obj_idx], obj)
+            _strip_all_secret_variables(ctx, [object_list, obj_idx], obj)
 
             # Currently, deployment actions and variables are unsupported.
             # Uncomment the following lines if and when the API does support them.
             # if object_list == "app_profile_list":
             #     for dep_idx, dep in enumerate(obj["deployment_create_list"]):
-            #         strip_all_secret_variables(
+            #         _strip_all_secret_variables(
+            #             ctx,
             #             [object_list, obj_idx, "deployment_create_list", dep_idx],
             #             dep,
             #         )
 
     for obj in objects:
-        strip_all_secret_variables([obj], resources.get(obj, {}))
+        _strip_all_secret_variables(ctx, [obj], resources.get(obj, {}))
 
 
 # Handling vmware secrets
 def strip_vmware_secrets(
-    path_list, obj, secret_variables=[], decompiled_secrets=[], not_stripped_secrets=[]
+    path_list,
+    obj,
+    secret_variables=None,
+    decompiled_secrets=None,
+    not_stripped_secrets=None,
 ):
+    # None sentinels instead of shared mutable defaults
+    if secret_variables is None:
+        secret_variables = []
+    if decompiled_secrets is None:
+        decompiled_secrets = {}
+    if not_stripped_secrets is None:
+        not_stripped_secrets = []
+
     path_list.extend(["create_spec", "resources", "guest_customization"])
     obj = obj["create_spec"]["resources"]["guest_customization"]
     vmware_secrets_context = "create_spec.resources.guest_customization.windows_data"
@@ -387,47 +474,50 @@ def strip_vmware_secrets(
         if not obj:
             return
 
+        # Bind the password dicts once instead of re-indexing obj per access
+        password = obj["password"]
         vmware_secrets_admin_context = (
             vmware_secrets_context
             + "windows_data"
             + ".password."
-            + obj["password"].get("name", "")
+            + password.get("name", "")
         )
         filtered_decompiled_vmware_secrets = get_secrets_from_context(
             decompiled_secrets, vmware_secrets_admin_context
         )
 
         # Check for admin_password
-        if obj.get("password", {}):
+        if password:
             if is_secret_modified(
                 filtered_decompiled_vmware_secrets,
-                obj["password"].get("name", ""),
-                obj["password"].get("value", None),
+                password.get("name", ""),
+                password.get("value", None),
             ):
                 secret_variables.append(
                     (
                         path_list + ["password"],
-                        obj["password"].pop("value", ""),
-                        obj["password"].get("name", ""),
+                        password.pop("value", ""),
+                        password.get("name", ""),
                     )
                 )
-                obj["password"]["attrs"] = {
+                password["attrs"] = {
                     "is_secret_modified": False,
                     "secret_reference": None,
                 }
             else:
                 not_stripped_secrets.append(
-                    (path_list + ["password"], obj["password"].get("value", ""))
+                    (path_list + ["password"], password.get("value", ""))
                 )
 
         # Now check for domain password
         if obj.get("is_domain", False):
-            if obj.get("domain_password", {}):
+            domain_password = obj.get("domain_password", {})
+            if domain_password:
                 vmware_secrets_domain_context = (
                     vmware_secrets_context
                     + "windows_data"
                     + ".domain_password."
-                    + obj["domain_password"].get("name", "")
+                    + domain_password.get("name", "")
                 )
 
                 filtered_decompiled_vmware_secrets = get_secrets_from_context(
@@ -435,17 +525,17 @@ def strip_vmware_secrets(
                 )
                 if is_secret_modified(
                     filtered_decompiled_vmware_secrets,
-                    obj["domain_password"].get("name", ""),
-                    obj["domain_password"].get("value", None),
+                    domain_password.get("name", ""),
+                    domain_password.get("value", None),
                 ):
                     secret_variables.append(
                         (
                             path_list + ["domain_password"],
-                            obj["domain_password"].pop("value", ""),
-                            obj["domain_password"]["name"],
+                            domain_password.pop("value", ""),
+                            domain_password["name"],
                         )
                     )
-                    obj["domain_password"]["attrs"] = {
+                    domain_password["attrs"] = {
                         "is_secret_modified": False,
                         "secret_reference": None,
                     }
@@ -453,12 +543,37 @@ def strip_vmware_secrets(
                     not_stripped_secrets.append(
                         (
                             path_list + ["domain_password"],
-                            obj["domain_password"].pop("value", ""),
+                            domain_password.pop("value", ""),
                         )
                     )
 
 
-def patch_secrets(resources, secret_map, secret_variables, existing_secrets=[]):
+# Leaf marker for the path trie built in patch_secrets
+_TRIE_LEAF = object()
+
+
+def _apply_secret_paths(resources, trie):
+    """
+    Walks resources alongside the path trie, applying the recorded
+    secret updates at the leaves. Shared path prefixes are descended once.
+    """
+
+    for sub_path, child in trie.items():
+        if sub_path is _TRIE_LEAF:
+            continue
+        if isinstance(resources, dict) and sub_path not in resources:
+            continue
+        variable = resources[sub_path]
+        for is_modified, secret in child.get(_TRIE_LEAF, []):
+            if is_modified:
+                variable["attrs"] = {"is_secret_modified": True}
+                variable["value"] = secret
+            else:
+                variable["attrs"] = {"is_secret_modified": False}
+        _apply_secret_paths(variable, child)
+
+
+def patch_secrets(resources, secret_map, secret_variables, existing_secrets=None):
     """
     Patches the secrests to payload
     Args:
@@ -469,6 +584,8 @@ def patch_secrets(resources, secret_map, secret_variables, existing_secrets=[]):
         dict: payload with secrets patched
     """
 
+    existing_secrets = existing_secrets or ()
+
     # Add creds back
     creds = resources.get("credential_definition_list", [])
     for cred in creds:
@@ -477,33 +594,30 @@ def patch_secrets(resources, secret_map, secret_variables, existing_secrets=[]):
             cred["secret"] = secret_map[name]
 
     # Add creds back for HTTP endpoint
-    auth = resources.get("authentication", {})
+    auth = resources.get(_AUTHENTICATION, {})
     username = auth.get("username", "")
     if (username) and (username in secret_map):
         auth["password"] = secret_map[username]
 
-    # Do not modify already existing secrets
+    # Bucket all secret paths into a prefix trie so that paths sharing a
+    # prefix (same profile, same task list) are walked through resources once.
+    # Existing secrets are inserted first so a later patch entry for the same
+    # path wins, matching the original application order.
+    trie = {}
     for path, secret in existing_secrets:
-        variable = resources
+        node = trie
         for sub_path in path:
-            if isinstance(variable, dict) and sub_path not in variable:
-                break
-            variable = variable[sub_path]
-        else:
-            variable["attrs"] = {"is_secret_modified": False}
-
-    if secret_variables:
-        for secret_var_data in secret_variables:
-            path = secret_var_data[0]
-            secret = secret_var_data[1]
-            variable = resources
-            for sub_path in path:
-                if isinstance(variable, dict) and sub_path not in variable:
-                    break
-                variable = variable[sub_path]
-            else:
-                variable["attrs"] = {"is_secret_modified": True}
-                variable["value"] = secret
+            node = node.setdefault(sub_path, {})
+        node.setdefault(_TRIE_LEAF, []).append((False, None))
+
+    for secret_var_data in secret_variables:
+        node = trie
+        for sub_path in secret_var_data[0]:
+            node = node.setdefault(sub_path, {})
+        node.setdefault(_TRIE_LEAF, []).append((True, secret_var_data[1]))
+
+    if trie:
+        _apply_secret_paths(resources, trie)
 
     return resources
 
@@ -556,92 +670,67 @@ def get_auth_info(api_key_location):
     return cred
 
 
-def _create_task_name_substrate_map(bp_payload, entity_type, **kwargs):
+def _create_substrate_maps(bp_payload, exported_bp_payload, entity_type, **kwargs):
+    """
+    Populates task_name_substrate_map and reference_runbook_to_substrate_map
+    for one entity type in a single pass, instead of walking the same
+    (entity -> action/patch list -> runbook -> task list) tree once per map.
+    """
     vm_power_action_uuid_substrate_map = kwargs.get(
         "vm_power_action_uuid_substrate_map", {}
     )
     task_name_substrate_map = kwargs.get("task_name_substrate_map", {})
-
-    entity_list = bp_payload["spec"]["resources"][entity_type]
-    for entity in entity_list:
-        entity_name = entity.get("name")
-        for action in entity.get("action_list", []):
-            action_name = action.get("name")
-            runbook = action.get("runbook", {})
-            if not runbook:
-                continue
-            for task in runbook.get("task_definition_list", []):
-                task_name = task.get("name")
-                if task.get("type", "") == "CALL_RUNBOOK" and task.get("attrs", {}):
-                    uuid = task["attrs"]["runbook_reference"].get("uuid", "")
-                    if not uuid:
-                        continue
-                    task_name_substrate_map[
-                        "{}_{}_{}".format(entity_name, action_name, task_name)
-                    ] = vm_power_action_uuid_substrate_map.get(uuid, "")
-
-        for config in entity.get("patch_list", []):
-            config_name = config.get("name")
-            runbook = config.get("runbook", {})
-            if not runbook:
-                continue
-            for task in runbook.get("task_definition_list", []):
-                task_name = task.get("name")
-                if task.get("type", "") == "CALL_RUNBOOK" and task.get("attrs", {}):
-                    uuid = task["attrs"]["runbook_reference"].get("uuid", "")
-                    if not uuid:
-                        continue
-                    task_name_substrate_map[
-                        "{}_{}_{}".format(entity_name, config_name, task_name)
-                    ] = vm_power_action_uuid_substrate_map.get(uuid, "")
-
-
-def _create_reference_runbook_substrate_map(exported_bp_payload, entity_type, **kwargs):
     reference_runbook_to_substrate_map = kwargs.get(
         "reference_runbook_to_substrate_map", {}
     )
-    task_name_substrate_map = kwargs.get("task_name_substrate_map", {})
 
+    # Bind the hot lookups to locals: the loops below are pure dict traversal,
+    # so attribute and method resolution is a measurable share of their cost
+    substrate_for_uuid = vm_power_action_uuid_substrate_map.get
+
+    # Map task refs to substrates using the runbook uuids from bp_payload
+    entity_list = bp_payload["spec"]["resources"][entity_type]
+    for entity in entity_list:
+        entity_name = entity.get("name")
+        for list_field in ("action_list", "patch_list"):
+            for item in entity.get(list_field, []):
+                item_name = item.get("name")
+                runbook = item.get("runbook", {})
+                if not runbook:
+                    continue
+                for task in runbook.get("task_definition_list", []):
+                    task_name = task.get("name")
+                    attrs = task.get("attrs")
+                    if task.get("type", "") == "CALL_RUNBOOK" and attrs:
+                        uuid = attrs["runbook_reference"].get("uuid", "")
+                        if not uuid:
+                            continue
+                        task_name_substrate_map[
+                            (entity_name, item_name, task_name)
+                        ] = substrate_for_uuid(uuid, "")
+
+    # Resolve actual runbook names to substrates using exported_bp_payload
     entity_list = exported_bp_payload["spec"]["resources"][entity_type]
     for entity in entity_list:
         entity_name = entity.get("name")
-        for action in entity.get("action_list", []):
-            action_name = action.get("name")
-            runbook = action.get("runbook", {})
-            if not runbook:
-                continue
-            for task in runbook.get("task_definition_list", []):
-                task_name = task.get("name")
-                if task.get("type", "") == "CALL_RUNBOOK" and task.get("attrs", {}):
-                    rb_name = task["attrs"]["runbook_reference"].get("name", "")
-                    task_ref = "{}_{}_{}".format(entity_name, action_name, task_name)
-                    if (
-                        task_ref in task_name_substrate_map
-                        and task_name_substrate_map[task_ref]
-                    ):
-                        reference_runbook_to_substrate_map[
-                            rb_name
-                        ] = task_name_substrate_map[task_ref]
-
-        for config in entity.get("patch_list", []):
-            config_name = config.get("name")
-            runbook = config.get("runbook", {})
-            if not runbook:
-                continue
-            for task in runbook.get("task_definition_list", []):
-                task_name = task.get("name")
-                if task.get("type", "") == "CALL_RUNBOOK" and task.get("attrs", {}):
-                    rb_name = task["attrs"]["runbook_reference"].get("name", "")
-                    if not rb_name:
-                        continue
-                    task_ref = "{}_{}_{}".format(entity_name, config_name, task_name)
-                    if (
-                        task_ref in task_name_substrate_map
-                        and task_name_substrate_map[task_ref]
-                    ):
-                        reference_runbook_to_substrate_map[
-                            rb_name
-                        ] = task_name_substrate_map[task_ref]
+        for list_field in ("action_list", "patch_list"):
+            for item in entity.get(list_field, []):
+                item_name = item.get("name")
+                runbook = item.get("runbook", {})
+                if not runbook:
+                    continue
+                for task in runbook.get("task_definition_list", []):
+                    task_name = task.get("name")
+                    attrs = task.get("attrs")
+                    if task.get("type", "") == "CALL_RUNBOOK" and attrs:
+                        rb_name = attrs["runbook_reference"].get("name", "")
+                        if not rb_name:
+                            continue
+                        substrate_name = task_name_substrate_map.get(
+                            (entity_name, item_name, task_name)
+                        )
+                        if substrate_name:
+                            reference_runbook_to_substrate_map[rb_name] = substrate_name
 
 
 def vm_power_action_target_map(bp_payload, exported_bp_payload):
@@ -687,9 +776,9 @@ def vm_power_action_target_map(bp_payload, exported_bp_payload):
     task_name_substrate_map = {}
     """
         task_name_substrate_map = {
-            "<profile_name>_<action_name>_<task_name>": substrate_name
+            ("<profile_name>", "<action_name>", "<task_name>"): substrate_name
         }
-        "<profile_name>_<action_name>_<task_name>" key is used to uniquely identify a task even if they are of same name
+        ("<profile_name>", "<action_name>", "<task_name>") key is used to uniquely identify a task even if they are of same name
     """
 
     # task name to substrate map holds target substrate for referenced power action runbook of a task
@@ -702,11 +791,11 @@ def vm_power_action_target_map(bp_payload, exported_bp_payload):
     """
 
     substrate_def_list = bp_payload["status"]["resources"]["substrate_definition_list"]
-    for substrate in substrate_def_list:
-        substrate_name = substrate.get("name")
-        for action in substrate.get("action_list", []):
-            runbook_id = action.get("runbook", {}).get("uuid", "")
-            vm_power_action_uuid_substrate_map[runbook_id] = substrate_name
+    vm_power_action_uuid_substrate_map = {
+        (action.get("runbook") or {}).get("uuid", ""): substrate.get("name")
+        for substrate in substrate_def_list
+        for action in substrate.get("action_list", [])
+    }
 
     kwargs = {
         "vm_power_action_uuid_substrate_map": vm_power_action_uuid_substrate_map,
@@ -720,12 +809,7 @@ def vm_power_action_target_map(bp_payload, exported_bp_payload):
         "package_definition_list",
     ]
     for entity_type in entity_type_list:
-        _create_task_name_substrate_map(bp_payload, entity_type, **kwargs)
-
-    for entity_type in entity_type_list:
-        _create_reference_runbook_substrate_map(
-            exported_bp_payload, entity_type, **kwargs
-        )
+        _create_substrate_maps(bp_payload, exported_bp_payload, entity_type, **kwargs)
 
     return reference_runbook_to_substrate_map
 
@@ -760,11 +844,10 @@ def strip_patch_config_tasks(resources):
         patch_config_task_list_map = {}
 
         for patch_config in profile.get("patch_list", []):
-            tasks = patch_config.get("runbook", {}).pop("task_definition_list", [])
-            patch_config_task_list_map[patch_config.get("name")] = tasks
-
             # Strips out runbook holding patch config tasks in patch list
-            patch_config.pop("runbook", "")
+            runbook = patch_config.pop("runbook", None)
+            tasks = runbook.get("task_definition_list", []) if runbook else []
+            patch_config_task_list_map[patch_config.get("name")] = tasks
 
         profile_patch_config_tasks[profile.get("name")] = patch_config_task_list_map
 
@@ -796,34 +879,9 @@ def add_patch_config_tasks(
 
     for profile in app_profile_list:
 
-        # profile level map holding task name uuid map for each config
-        cur_profile_task_name_uuid_map = {}
-        """
-            cur_profile_task_name_uuid_map = {
-                "patch_config1": {
-                    "task1": "<uuid>",
-                    "task2": "<uuid>",
-                    "task3": "<uuid>"
-                },
-                "patch_config2": {
-                    "task4": "<uuid>",
-                    "task5": "<uuid>",
-                }
-            }
-        """
-
         # holds patch config tasks for current profile
         patch_config_task_list_map = profile_patch_config_tasks.get(profile["name"], {})
 
-        # iterate over all tasks in patch list and create task_name_uuid_map_list
-        for config_name, task_list in patch_config_task_list_map.items():
-            task_name_uuid_map = {}
-            # cur_profile_patch_config_tasks[config_name] = task_list
-            for _task in task_list:
-                task_name_uuid_map[_task["name"]] = _task["uuid"]
-
-            cur_profile_task_name_uuid_map[config_name] = task_name_uuid_map
-
         # append patch config tasks to system defined tasks in patch config
         for patch_config in profile.get("patch_list", []):
             patch_config_runbook = patch_config.get("runbook", {})
@@ -831,14 +889,22 @@ def add_patch_config_tasks(
                 continue
 
             # removing additional attributes of patch runbook
-            patch_config_runbook.pop("state", "")
-            patch_config_runbook.pop("message_list", "")
+            for field in _RUNBOOK_STRIP_FIELDS:
+                patch_config_runbook.pop(field, None)
 
             system_tasks = patch_config_runbook.get("task_definition_list", [])
             system_dag_task = system_tasks[0]
             config_name = patch_config.get("name")
 
-            for custom_task in patch_config_task_list_map[config_name]:
+            # per-config locals, resolved once instead of per custom task/edge.
+            # The name->uuid inversion is built here, only for configs that are
+            # actually assembled, rather than eagerly for the whole profile
+            config_tasks = patch_config_task_list_map[config_name]
+            task_name_uuid_map = {
+                _task["name"]: _task["uuid"] for _task in config_tasks
+            }
+
+            for custom_task in config_tasks:
                 if "target_any_local_reference" in custom_task:
                     service_name = custom_task["target_any_local_reference"]["name"]
                     service_uuid = service_name_uuid_map.get(service_name, None)
@@ -880,43 +946,31 @@ def add_patch_config_tasks(
                         "to_task_reference": {
                             "kind": "app_task",
                             "name": user_first_task_name,
-                            "uuid": cur_profile_task_name_uuid_map[config_name][
-                                user_first_task_name
-                            ],
+                            "uuid": task_name_uuid_map[user_first_task_name],
                         },
                     }
 
                     # remaining edges from first task to rest of tasks
                     user_task_edges = custom_task["attrs"]["edges"]
                     for edge in user_task_edges:
-                        task_name = edge["from_task_reference"]["name"]
-                        edge["from_task_reference"][
-                            "uuid"
-                        ] = cur_profile_task_name_uuid_map[config_name][task_name]
-                        task_name = edge["to_task_reference"]["name"]
-                        edge["to_task_reference"][
-                            "uuid"
-                        ] = cur_profile_task_name_uuid_map[config_name][task_name]
-                    system_dag_task["attrs"]["edges"] = [first_edge]
-                    system_dag_task["attrs"]["edges"].extend(user_task_edges)
+                        from_ref = edge["from_task_reference"]
+                        from_ref["uuid"] = task_name_uuid_map[from_ref["name"]]
+                        to_ref = edge["to_task_reference"]
+                        to_ref["uuid"] = task_name_uuid_map[to_ref["name"]]
+                    system_dag_task["attrs"]["edges"] = [first_edge, *user_task_edges]
 
+            # removing additional attributes in a single cleanup pass
             for task in system_tasks:
-                # removing additional attributes
-                task.pop("state", "")
-                task.pop("message_list", "")
-
-    # profile level counter
-    profile_idx = 0
-
-    # attaching updated patch runbook to patch runbook in spec
-    for profile in resources.get("app_profile_list", []):
-        # patch list counter
-        idx = 0
-
-        for patch_config in profile.get("patch_list", []):
-            patch_config["runbook"] = app_profile_list[profile_idx]["patch_list"][idx][
-                "runbook"
-            ]
-            idx += 1
-
-        profile_idx += 1
+                for field in _RUNBOOK_STRIP_FIELDS:
+                    task.pop(field, None)
+
+    # attaching updated patch runbook to patch runbook in spec. The spec and
+    # status profile lists describe the same blueprint, so walk them in
+    # lockstep instead of indexing one from counters over the other
+    for profile, status_profile in zip(
+        resources.get("app_profile_list", []), app_profile_list
+    ):
+        for patch_config, status_patch_config in zip(
+            profile.get("patch_list", []), status_profile["patch_list"]
+        ):
+            patch_config["runbook"] = status_patch_config["runbook"]
@@ -1,7 +1,11 @@
 import os
 import sys
+import copy
 import inspect
+from functools import lru_cache
+
 from ruamel import yaml
+
 from calm.dsl.providers import get_provider
 from calm.dsl.builtins import file_exists
 
@@ -43,6 +47,14 @@ def provider_spec(spec):
     return _ProviderSpec(spec)
 
 
+@lru_cache(maxsize=None)
+def _load_spec_file(file_path, mtime):
+    """parses the spec file; mtime keys out stale cache entries on rewrite"""
+
+    with open(file_path, "r") as f:
+        return yaml.safe_load(f.read())
+
+
 def read_spec(filename, depth=1):
     file_path = os.path.join(
         os.path.dirname(inspect.getfile(sys._getframe(depth))), filename
@@ -52,10 +64,9 @@ def read_spec(filename, depth=1):
         LOG.debug("file {} not found at location {}".format(filename, file_path))
         raise ValueError("file {} not found".format(filename))
 
-    with open(file_path, "r") as f:
-        spec = yaml.safe_load(f.read())
-
-    return spec
+    # Callers mutate the returned spec, so hand out a copy of the cached parse
+    spec = _load_spec_file(file_path, os.path.getmtime(file_path))
+    return copy.deepcopy(spec)
 
 
 def read_provider_spec(filename):
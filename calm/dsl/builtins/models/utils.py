@@ -2,6 +2,7 @@ import os
 import sys
 import inspect
 import json
+from functools import lru_cache
 
 from ruamel import yaml
 import re
@@ -12,6 +13,14 @@ LOG = get_logging_handle(__name__)
 COMPILE_WITH_SECRETS = True
 
 
+@lru_cache(maxsize=None)
+def _read_file_cached(file_path, mtime_ns, size):
+    """reads the file; mtime/size key out stale cache entries on rewrite"""
+
+    with open(file_path, "r") as data:
+        return data.read()
+
+
 def read_file(filename, depth=1, default=None):
     """reads the file"""
 
@@ -38,8 +47,8 @@ def read_file(filename, depth=1, default=None):
         )
         return default
 
-    with open(file_path, "r") as data:
-        return data.read()
+    file_stat = os.stat(file_path)
+    return _read_file_cached(file_path, file_stat.st_mtime_ns, file_stat.st_size)
 
 
 def _get_caller_filepath(filename, depth=2):
@@ -148,6 +157,7 @@ def str_presenter(dumper, data):
 yaml.add_representer(str, str_presenter)
 
 
+@lru_cache(maxsize=4096)
 def get_valid_identifier(data=None):
     """returns a valid indentifier out of string"""
 
@@ -69,6 +69,9 @@ Variable = _var()
 
 def setvar(name, value, type_="LOCAL", **kwargs):
 
+    # Note: the produced class cannot be cached/shared across calls even for
+    # identical kwargs - parent entities mutate it after creation (__parent__
+    # wiring in EntityType.update_attrs), so every variable needs its own class.
     kwargs["name"] = name
     if value is not None:
         kwargs["value"] = value
@@ -1,4 +1,5 @@
 import click
+import copy
 import json
 import sys
 import uuid
@@ -21,6 +22,18 @@ from .utils import get_name_query, highlight_text
 LOG = get_logging_handle(__name__)
 CALM_VERSION = Version.get_version("Calm")
 
+# Entity filter templates for system roles, dispatched by role name.
+# TODO remove index based searching in the project-scoped templates
+_SYSTEM_ROLE_FILTER_TEMPLATES = {
+    ROLE.PROJECT_ADMIN: ACP.ENTITY_FILTER_EXPRESSION_LIST.PROJECT_ADMIN,
+    ROLE.DEVELOPER: ACP.ENTITY_FILTER_EXPRESSION_LIST.DEVELOPER,
+    ROLE.CONSUMER: ACP.ENTITY_FILTER_EXPRESSION_LIST.CONSUMER,
+    ROLE.OPERATOR: ACP.ENTITY_FILTER_EXPRESSION_LIST.OPERATOR,
+}
+
+# Roles whose template carries a project uuid placeholder at index 4
+_PROJECT_SCOPED_FILTER_ROLES = (ROLE.PROJECT_ADMIN, ROLE.DEVELOPER)
+
 
 def get_acps_from_project(client, project_uuid, **kwargs):
     """This routine gets acps from project using project uuid"""
@@ -87,15 +100,13 @@ def get_acps(name, project_name, filter_by, limit, offset, quiet, out):
         sys.exit(-1)
 
     params = {"length": limit, "offset": offset}
-    filter_query = ""
+    filter_clauses = []
     if name:
-        filter_query = get_name_query([name])
+        filter_clauses.append(get_name_query([name]))
     if filter_by:
-        filter_query = filter_query + ";(" + filter_by + ")"
-    if filter_query.startswith(";"):
-        filter_query = filter_query[1:]
-    if filter_query:
-        params["filter"] = filter_query
+        filter_clauses.append("({})".format(filter_by))
+    if filter_clauses:
+        params["filter"] = ";".join(filter_clauses)
 
     if project_uuid:
         res, err = get_acps_from_project(
@@ -131,9 +142,9 @@ def get_acps(name, project_name, filter_by, limit, offset, quiet, out):
         return
 
     if quiet:
-        for _row in json_rows:
-            row = _row["status"]
-            click.echo(highlight_text(row["name"]))
+        click.echo(
+            "\n".join(highlight_text(_row["status"]["name"]) for _row in json_rows)
+        )
         return
 
     table = PrettyTable()
@@ -144,19 +155,19 @@ def get_acps(name, project_name, filter_by, limit, offset, quiet, out):
         "UUID",
     ]
 
+    add_row = table.add_row
+    highlighted_project = highlight_text(project_name)
     for _row in json_rows:
         row = _row["status"]
-        metadata = _row["metadata"]
 
         role_ref = row["resources"].get("role_reference", {})
-        role = role_ref.get("name", "-")
 
-        table.add_row(
+        add_row(
             [
                 highlight_text(row["name"]),
-                highlight_text(role),
-                highlight_text(project_name),
-                highlight_text(metadata["uuid"]),
+                highlight_text(role_ref.get("name", "-")),
+                highlighted_project,
+                highlight_text(_row["metadata"]["uuid"]),
             ]
         )
 
@@ -210,30 +221,26 @@ def create_acp(role, project, acp_users, acp_groups, name):
     project_payload.pop("status", None)
     project_resources = project_payload["spec"]["project_detail"].get("resources", "")
 
-    # Check if users are present in project
-    project_users = []
-    for user in project_resources.get("user_reference_list", []):
-        project_users.append(user["name"])
+    # Check if users are present in project, building each set once and
+    # validating with a single set difference
+    project_users = {
+        user["name"] for user in project_resources.get("user_reference_list", [])
+    }
 
-    if not set(acp_users).issubset(set(project_users)):
-        LOG.error(
-            "Users {} are not registered in project".format(
-                set(acp_users).difference(set(project_users))
-            )
-        )
+    missing_users = set(acp_users) - project_users
+    if missing_users:
+        LOG.error("Users {} are not registered in project".format(missing_users))
         sys.exit(-1)
 
     # Check if groups are present in project
-    project_groups = []
-    for group in project_resources.get("external_user_group_reference_list", []):
-        project_groups.append(group["name"])
+    project_groups = {
+        group["name"]
+        for group in project_resources.get("external_user_group_reference_list", [])
+    }
 
-    if not set(acp_groups).issubset(set(project_groups)):
-        LOG.error(
-            "Groups {} are not registered in project".format(
-                set(acp_groups).difference(set(project_groups))
-            )
-        )
+    missing_groups = set(acp_groups) - project_groups
+    if missing_groups:
+        LOG.error("Groups {} are not registered in project".format(missing_groups))
         sys.exit(-1)
 
     role_cache_data = Cache.get_entity_data(entity_type=CACHE.ENTITY.ROLE, name=role)
@@ -260,28 +267,31 @@ def create_acp(role, project, acp_users, acp_groups, name):
 
     # Constructing ACP payload --------
 
-    # Getting the cluster uuids for acp
-    whitelisted_subnets = []
-    whiltelisted_clusters = []
-    for subnet in project_resources.get("subnet_reference_list", []):
-        whitelisted_subnets.append(subnet["uuid"])
-
-    for subnet in project_resources.get("external_network_list", []):
-        whitelisted_subnets.append(subnet["uuid"])
-
-    for cluster in project_resources.get("cluster_reference_list", []):
-        whiltelisted_clusters.append(cluster["uuid"])
+    # Getting the cluster uuids for acp. Subnets may appear in both the
+    # project subnet list and the external network list, so dedupe before
+    # hitting the cache and resolve them all with a single query
+    whitelisted_subnets = {
+        subnet["uuid"] for subnet in project_resources.get("subnet_reference_list", [])
+    }
+    whitelisted_subnets.update(
+        subnet["uuid"] for subnet in project_resources.get("external_network_list", [])
+    )
 
-    cluster_uuids = []
-    for subnet_uuid in whitelisted_subnets:
-        subnet_cache_data = Cache.get_entity_data_using_uuid(
-            entity_type=CACHE.ENTITY.AHV_SUBNET, uuid=subnet_uuid
-        )
+    whiltelisted_clusters = {
+        cluster["uuid"]
+        for cluster in project_resources.get("cluster_reference_list", [])
+    }
 
-        if subnet_cache_data.get("subnet_type", "VLAN") == "VLAN":
-            cluster_uuids.append(subnet_cache_data["cluster_uuid"])
+    subnets_cache_data = Cache.get_entities_data_using_uuids(
+        entity_type=CACHE.ENTITY.AHV_SUBNET, uuids=whitelisted_subnets
+    )
+    cluster_uuids = {
+        subnet_cache_data["cluster_uuid"]
+        for subnet_cache_data in subnets_cache_data.values()
+        if subnet_cache_data.get("subnet_type", "VLAN") == "VLAN"
+    }
 
-    cluster_uuids = list(set(whiltelisted_clusters) | set(cluster_uuids))
+    cluster_uuids = list(whiltelisted_clusters | cluster_uuids)
     # Default context for acp
     default_context = ACP.DEFAULT_CONTEXT
     project_collab_context = ACP.PROJECT_COLLAB_CONTEXT
@@ -302,38 +312,22 @@ def create_acp(role, project, acp_users, acp_groups, name):
         "uuid_list"
     ] = [project_uuid]
 
-    # Role specific filters
-    entity_filter_expression_list = []
-    if role == ROLE.PROJECT_ADMIN:
-        entity_filter_expression_list = (
-            ACP.ENTITY_FILTER_EXPRESSION_LIST.PROJECT_ADMIN
-        )  # TODO remove index bases searching
-        entity_filter_expression_list[4]["right_hand_side"]["uuid_list"] = [
-            project_uuid
-        ]
-        entity_filter_expression_list = get_updated_acp_filter_list(
-            role, entity_filter_expression_list, "global"
-        )
-
-    elif role == ROLE.DEVELOPER:
-        entity_filter_expression_list = ACP.ENTITY_FILTER_EXPRESSION_LIST.DEVELOPER
-        entity_filter_expression_list[4]["right_hand_side"]["uuid_list"] = [
-            project_uuid
-        ]
-
-        entity_filter_expression_list = get_updated_acp_filter_list(
-            role, entity_filter_expression_list, "global"
-        )
-
-    elif role == ROLE.CONSUMER:
-        entity_filter_expression_list = ACP.ENTITY_FILTER_EXPRESSION_LIST.CONSUMER
-
-        entity_filter_expression_list = get_updated_acp_filter_list(
-            role, entity_filter_expression_list, "global"
-        )
-
-    elif role == ROLE.OPERATOR and cluster_uuids:
-        entity_filter_expression_list = ACP.ENTITY_FILTER_EXPRESSION_LIST.OPERATOR
+    # Role specific filters, dispatched through the system-role template map
+    entity_filter_expression_list = _SYSTEM_ROLE_FILTER_TEMPLATES.get(role)
+    if role == ROLE.OPERATOR and not cluster_uuids:
+        entity_filter_expression_list = None
+
+    if entity_filter_expression_list is not None:
+        # work on a copy - the templates are shared class-level lists, and both
+        # the uuid substitution below and the extend() calls inside
+        # get_updated_acp_filter_list would otherwise corrupt them for every
+        # later create_acp call in this process
+        entity_filter_expression_list = copy.deepcopy(entity_filter_expression_list)
+
+        if role in _PROJECT_SCOPED_FILTER_ROLES:
+            entity_filter_expression_list[4]["right_hand_side"]["uuid_list"] = [
+                project_uuid
+            ]
 
         entity_filter_expression_list = get_updated_acp_filter_list(
             role, entity_filter_expression_list, "global"
@@ -364,19 +358,16 @@ def create_acp(role, project, acp_users, acp_groups, name):
         )
 
     # TODO check these users are not present in project's other acps
-    user_references = []
     user_name_uuid_map = client.user.get_name_uuid_map({"length": 1000})
-    for u in acp_users:
-        user_references.append(
-            {"kind": "user", "name": u, "uuid": user_name_uuid_map[u]}
-        )
+    user_references = [
+        {"kind": "user", "name": u, "uuid": user_name_uuid_map[u]} for u in acp_users
+    ]
 
     usergroup_name_uuid_map = client.group.get_name_uuid_map({"length": 1000})
-    group_references = []
-    for g in acp_groups:
-        group_references.append(
-            {"kind": "user_group", "name": g, "uuid": usergroup_name_uuid_map[g]}
-        )
+    group_references = [
+        {"kind": "user_group", "name": g, "uuid": usergroup_name_uuid_map[g]}
+        for g in acp_groups
+    ]
 
     context_list = [default_context]
     if entity_filter_expression_list:
@@ -465,14 +456,25 @@ def get_filters_custom_role(
     return entity_filter_expression_list
 
 
-def delete_acp(acp_name, project_name):
+def get_project_uuid(client, project_name):
+    """Resolve a project uuid from the local cache, falling back to the API"""
 
-    client = get_api_client()
+    project_cache_data = Cache.get_entity_data(
+        entity_type=CACHE.ENTITY.PROJECT, name=project_name
+    )
+    if project_cache_data:
+        return project_cache_data.get("uuid", "")
 
     params = {"length": 250, "filter": "name=={}".format(project_name)}
     project_name_uuid_map = client.project.get_name_uuid_map(params)
+    return project_name_uuid_map.get(project_name, "")
 
-    project_uuid = project_name_uuid_map.get(project_name, "")
+
+def delete_acp(acp_name, project_name):
+
+    client = get_api_client()
+
+    project_uuid = get_project_uuid(client, project_name)
     if not project_uuid:
         LOG.error("Project '{}' not found.".format(project_name))
         sys.exit(-1)
@@ -523,10 +525,7 @@ def describe_acp(acp_name, project_name, out):
 
     client = get_api_client()
 
-    params = {"length": 250, "filter": "name=={}".format(project_name)}
-    project_name_uuid_map = client.project.get_name_uuid_map(params)
-
-    project_uuid = project_name_uuid_map.get(project_name, "")
+    project_uuid = get_project_uuid(client, project_name)
     if not project_uuid:
         LOG.error("Project '{}' not found".format(project_name))
         sys.exit(-1)
@@ -628,38 +627,35 @@ def update_acp(
     project_payload.pop("status", None)
 
     project_resources = project_payload["spec"]["project_detail"]["resources"]
-    project_users = []
-    project_groups = []
-    for user in project_resources.get("user_reference_list", []):
-        project_users.append(user["name"])
-
-    for group in project_resources.get("external_user_group_reference_list", []):
-        project_groups.append(group["name"])
+    project_users = {
+        user["name"] for user in project_resources.get("user_reference_list", [])
+    }
+    project_groups = {
+        group["name"]
+        for group in project_resources.get("external_user_group_reference_list", [])
+    }
 
     # Checking if to be added users/groups are registered in project
-    if not set(add_user_list).issubset(set(project_users)):
-        LOG.error(
-            "Users {} are not registered in project".format(
-                set(add_user_list).difference(set(project_users))
-            )
-        )
+    add_users = set(add_user_list)
+    add_groups = set(add_group_list)
+
+    missing_users = add_users - project_users
+    if missing_users:
+        LOG.error("Users {} are not registered in project".format(missing_users))
         sys.exit(-1)
 
-    if not set(add_group_list).issubset(set(project_groups)):
-        LOG.error(
-            "Groups {} are not registered in project".format(
-                set(add_group_list).difference(set(project_groups))
-            )
-        )
+    missing_groups = add_groups - project_groups
+    if missing_groups:
+        LOG.error("Groups {} are not registered in project".format(missing_groups))
         sys.exit(-1)
 
     # Raise error if same user/group is present in both add/remove list
-    common_users = set(add_user_list).intersection(set(remove_user_list))
+    common_users = add_users.intersection(remove_user_list)
     if common_users:
         LOG.error("Users {} are both in add_user and remove_user".format(common_users))
         sys.exit(-1)
 
-    common_groups = set(add_group_list).intersection(set(remove_group_list))
+    common_groups = add_groups.intersection(remove_group_list)
     if common_groups:
         LOG.error(
             "Groups {} are present both in add_groups and remove_groups".format(
@@ -676,57 +672,57 @@ def update_acp(
         if _row["acp"]["name"] == acp_name:
             is_acp_present = True
             acp_resources = _row["acp"]["resources"]
-            updated_user_reference_list = []
-            updated_group_reference_list = []
 
-            acp_users = []
-            acp_groups = []
-            for user in acp_resources.get("user_reference_list", []):
-                acp_users.append(user["name"])
-
-            for group in acp_resources.get("user_group_reference_list", []):
-                acp_groups.append(group["name"])
+            acp_users = {
+                user["name"] for user in acp_resources.get("user_reference_list", [])
+            }
+            acp_groups = {
+                group["name"]
+                for group in acp_resources.get("user_group_reference_list", [])
+            }
 
-            if not set(remove_user_list).issubset(set(acp_users)):
+            unregistered_users = set(remove_user_list) - acp_users
+            if unregistered_users:
                 LOG.error(
-                    "Users {} are not registered in acp".format(
-                        set(remove_user_list).difference(set(acp_users))
-                    )
+                    "Users {} are not registered in acp".format(unregistered_users)
                 )
                 sys.exit(-1)
 
-            if not set(remove_group_list).issubset(set(acp_groups)):
+            unregistered_groups = set(remove_group_list) - acp_groups
+            if unregistered_groups:
                 LOG.error(
-                    "Groups {} are not registered in acp".format(
-                        set(remove_group_list).difference(set(acp_groups))
-                    )
+                    "Groups {} are not registered in acp".format(unregistered_groups)
                 )
                 sys.exit(-1)
 
-            for user in acp_resources.get("user_reference_list", []):
-                if user["name"] not in remove_user_list:
-                    updated_user_reference_list.append(user)
+            updated_user_reference_list = [
+                user
+                for user in acp_resources.get("user_reference_list", [])
+                if user["name"] not in remove_user_list
+            ]
 
-            for group in acp_resources.get("user_group_reference_list", []):
-                if group["name"] not in remove_group_list:
-                    updated_group_reference_list.append(group)
+            updated_group_reference_list = [
+                group
+                for group in acp_resources.get("user_group_reference_list", [])
+                if group["name"] not in remove_group_list
+            ]
 
             # TODO check these users are not present in project's other acps
             user_name_uuid_map = client.user.get_name_uuid_map({"length": 1000})
-            for user in add_user_list:
-                updated_user_reference_list.append(
-                    {"kind": "user", "name": user, "uuid": user_name_uuid_map[user]}
-                )
+            updated_user_reference_list.extend(
+                {"kind": "user", "name": user, "uuid": user_name_uuid_map[user]}
+                for user in add_user_list
+            )
 
             usergroup_name_uuid_map = client.group.get_name_uuid_map({"length": 1000})
-            for group in add_group_list:
-                updated_group_reference_list.append(
-                    {
-                        "kind": "user_group",
-                        "name": group,
-                        "uuid": usergroup_name_uuid_map[group],
-                    }
-                )
+            updated_group_reference_list.extend(
+                {
+                    "kind": "user_group",
+                    "name": group,
+                    "uuid": usergroup_name_uuid_map[group],
+                }
+                for group in add_group_list
+            )
 
             acp_resources["user_reference_list"] = updated_user_reference_list
             acp_resources["user_group_reference_list"] = updated_group_reference_list
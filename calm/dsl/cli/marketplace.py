@@ -1,9 +1,11 @@
 import uuid
 import click
+import secrets
 import sys
 import json
 import os
 
+from functools import lru_cache
 from prettytable import PrettyTable
 from distutils.version import LooseVersion as LV
 
@@ -26,6 +28,7 @@ from calm.dsl.store import Version
 from .constants import MARKETPLACE_ITEM
 
 LOG = get_logging_handle(__name__)
+CALM_VERSION = Version.get_version("Calm")
 APP_STATES = [
     MARKETPLACE_ITEM.STATES.PENDING,
     MARKETPLACE_ITEM.STATES.ACCEPTED,
@@ -38,8 +41,9 @@ APP_SOURCES = [
 ]
 
 
+@lru_cache(maxsize=1)
 def get_app_family_list():
-    """returns the app family list categories"""
+    """returns the app family list categories (static within a CLI run)"""
 
     client = get_api_client()
     Obj = get_resource_api("categories/AppFamily", client.connection)
@@ -58,23 +62,31 @@ def get_app_family_list():
     return categories
 
 
+def _index_entity_data(data_list):
+    """index a group api entity's data by field name for O(1) field lookups"""
+
+    return {entity["name"]: entity["values"] for entity in data_list}
+
+
 def get_group_data_value(data_list, field, value_list=False):
     """to find the field value in group api call
     return whole list of values if value_list is True
+
+    data_list may also be an index built by _index_entity_data, which callers
+    reading many fields of the same entity should prefer
     """
 
-    for entity in data_list:
-        if entity["name"] == field:
-            entity_value = entity["values"]
-            if not entity_value:
-                return None
-            if value_list:
-                return entity_value[0]["values"]
-            else:
-                _value_list = entity_value[0].get("values", [])
-                return _value_list[0] if _value_list else ""
+    if not isinstance(data_list, dict):
+        data_list = _index_entity_data(data_list)
+
+    entity_value = data_list.get(field)
+    if not entity_value:
+        return None
+    if value_list:
+        return entity_value[0]["values"]
 
-    return None
+    _value_list = entity_value[0].get("values", [])
+    return _value_list[0] if _value_list else ""
 
 
 def trunc_string(data=None, max_length=50):
@@ -82,61 +94,69 @@ def trunc_string(data=None, max_length=50):
     if not data:
         return "-"
 
-    if len(data) > max_length:
-        return data[: max_length - 1] + "..."
-
-    return data
+    return data if len(data) <= max_length else data[: max_length - 1] + "..."
 
 
 def get_mpis_group_call(
     name=None,
     app_family="All",
     app_states=[],
-    group_member_count=0,
+    group_member_count=None,
     app_source=None,
     app_group_uuid=None,
     type=None,
     filter_by="",
+    attributes=None,
+    group_count=64,
 ):
     """
     To call groups() api for marketplace items
-    if group_member_count is 0, it will not apply the group_count filter
+    if group_member_count is None, members are not restricted; an explicit
+    0 asks the server for counts only (no member payloads)
+    attributes restricts the group_member_attributes fetched; callers that
+    only need a field or two should pass just those instead of the full set
     """
 
     client = get_api_client()
-    filter = "marketplace_item_type_list==APP"
+    filter_parts = ["marketplace_item_type_list==APP"]
 
     if app_states:
-        filter += get_states_filter(state_key="app_state", states=app_states)
+        # get_states_filter returns a ";(...)" fragment; strip its separator
+        filter_parts.append(
+            get_states_filter(state_key="app_state", states=app_states)[1:]
+        )
 
     if app_family != "All":
-        filter += ";category_name==AppFamily;category_value=={}".format(app_family)
+        filter_parts.append("category_name==AppFamily")
+        filter_parts.append("category_value=={}".format(app_family))
 
     if filter_by:
-        filter = filter + ";(" + filter_by + ")"
+        filter_parts.append("({})".format(filter_by))
 
     if name:
-        filter += ";name=={}".format(name)
+        filter_parts.append("name=={}".format(name))
 
     if app_source:
-        filter += ";app_source=={}".format(app_source)
+        filter_parts.append("app_source=={}".format(app_source))
 
     if app_group_uuid:
-        filter += ";app_group_uuid=={}".format(app_group_uuid)
+        filter_parts.append("app_group_uuid=={}".format(app_group_uuid))
 
-    CALM_VERSION = Version.get_version("Calm")
     if type and LV(CALM_VERSION) >= LV("3.2.0"):
-        filter += ";type=={}".format(type)
+        filter_parts.append("type=={}".format(type))
+
+    filter = ";".join(filter_parts)
 
     payload = {
         "group_member_sort_attribute": "version",
         "group_member_sort_order": "DESCENDING",
         "grouping_attribute": "app_group_uuid",
-        "group_count": 64,
+        "group_count": group_count,
         "group_offset": 0,
         "filter_criteria": filter,
         "entity_type": "marketplace_item",
-        "group_member_attributes": [
+        "group_member_attributes": attributes
+        or [
             {"attribute": "name"},
             {"attribute": "type"},
             {"attribute": "author"},
@@ -157,7 +177,7 @@ def get_mpis_group_call(
         ],
     }
 
-    if group_member_count:
+    if group_member_count is not None:
         payload["group_member_count"] = group_member_count
 
     # TODO Create GroupAPI separately for it.
@@ -177,7 +197,7 @@ def get_marketplace_store_items(
 ):
     """Lists marketplace store items"""
 
-    group_member_count = 0
+    group_member_count = None
     if not display_all:
         group_member_count = 1
 
@@ -188,14 +208,21 @@ def get_marketplace_store_items(
         group_member_count=group_member_count,
         filter_by=filter_by,
         type=type,
+        # quiet output only echoes names; skip the other attributes
+        attributes=[{"attribute": "name"}] if quiet else None,
     )
     group_results = res["group_results"]
 
     if quiet:
-        for group in group_results:
-            entity_results = group["entity_results"]
-            entity_data = entity_results[0]["data"]
-            click.echo(highlight_text(get_group_data_value(entity_data, "name")))
+        if group_results:
+            click.echo(
+                "\n".join(
+                    highlight_text(
+                        get_group_data_value(group["entity_results"][0]["data"], "name")
+                    )
+                    for group in group_results
+                )
+            )
         return
 
     table = PrettyTable()
@@ -211,7 +238,8 @@ def get_marketplace_store_items(
         entity_results = group["entity_results"]
 
         for entity in entity_results:
-            entity_data = entity["data"]
+            # index once; each row reads many fields of the same entity
+            entity_data = _index_entity_data(entity["data"])
             project_names = get_group_data_value(
                 entity_data, "project_names", value_list=True
             )
@@ -256,14 +284,21 @@ def get_marketplace_items(
         app_states=app_states,
         filter_by=filter_by,
         type=type,
+        # quiet output only echoes names; skip the other attributes
+        attributes=[{"attribute": "name"}] if quiet else None,
     )
     group_results = res["group_results"]
 
     if quiet:
-        for group in group_results:
-            entity_results = group["entity_results"]
-            entity_data = entity_results[0]["data"]
-            click.echo(highlight_text(get_group_data_value(entity_data, "name")))
+        if group_results:
+            click.echo(
+                "\n".join(
+                    highlight_text(
+                        get_group_data_value(group["entity_results"][0]["data"], "name")
+                    )
+                    for group in group_results
+                )
+            )
         return
 
     table = PrettyTable()
@@ -286,7 +321,8 @@ def get_marketplace_items(
         entity_results = group["entity_results"]
 
         for entity in entity_results:
-            entity_data = entity["data"]
+            # index once; each row reads many fields of the same entity
+            entity_data = _index_entity_data(entity["data"])
             project_names = get_group_data_value(
                 entity_data, "project_names", value_list=True
             )
@@ -325,7 +361,8 @@ def get_marketplace_items(
     click.echo(table)
 
 
-def get_mpi_latest_version(name, app_source=None, app_states=[], type=None):
+@lru_cache(maxsize=64)
+def _get_mpi_latest_version(name, app_source, app_states, type):
 
     res = get_mpis_group_call(
         name=name,
@@ -333,6 +370,8 @@ def get_mpi_latest_version(name, app_source=None, app_states=[], type=None):
         group_member_count=1,
         app_source=app_source,
         type=type,
+        attributes=[{"attribute": "version"}],
+        group_count=1,
     )
     group_results = res["group_results"]
 
@@ -346,6 +385,13 @@ def get_mpi_latest_version(name, app_source=None, app_states=[], type=None):
     return entity_version
 
 
+def get_mpi_latest_version(name, app_source=None, app_states=[], type=None):
+    """version resolution is cached per (name, source, states, type) - several
+    command flows resolve the same item's latest version twice back to back"""
+
+    return _get_mpi_latest_version(name, app_source, tuple(app_states), type)
+
+
 def get_mpi_all_versions(name, app_source=None, app_states=[], type=None):
 
     res = get_mpis_group_call(
@@ -354,6 +400,8 @@ def get_mpi_all_versions(name, app_source=None, app_states=[], type=None):
         group_member_count=20,
         app_source=app_source,
         type=type,
+        attributes=[{"attribute": "version"}],
+        group_count=1,
     )
     group_results = res["group_results"]
 
@@ -383,11 +431,11 @@ def get_mpi_by_name_n_version(name, version, app_states=[], app_source=None, typ
     if app_source:
         filter += ";app_source=={}".format(app_source)
 
-    CALM_VERSION = Version.get_version("Calm")
     if type and LV(CALM_VERSION) >= LV("3.2.0"):
         filter += ";type=={}".format(type)
 
-    payload = {"length": 250, "filter": filter}
+    # only the first match is read below, so don't ask the server for a page
+    payload = {"length": 1, "filter": filter}
 
     LOG.debug("Calling list api on marketplace_items")
     res, err = client.market_place.list(params=payload)
@@ -415,6 +463,43 @@ def get_mpi_by_name_n_version(name, version, app_states=[], app_source=None, typ
     return res
 
 
+def get_latest_mpi(name, app_states=[], app_source=None, type=None):
+    """
+    Resolves the latest version of a marketplace item and reads it in one
+    group call plus one read, instead of the group + list + read sequence of
+    get_mpi_latest_version followed by get_mpi_by_name_n_version.
+    Returns the read payload and the resolved version.
+    """
+
+    client = get_api_client()
+    res = get_mpis_group_call(
+        name=name,
+        app_states=app_states,
+        group_member_count=1,
+        app_source=app_source,
+        type=type,
+        attributes=[{"attribute": "version"}],
+        group_count=1,
+    )
+    group_results = res["group_results"]
+
+    if not group_results:
+        LOG.error("No Marketplace Item found with name {}".format(name))
+        sys.exit(-1)
+
+    entity = group_results[0]["entity_results"][0]
+    version = get_group_data_value(entity["data"], "version")
+    mpi_uuid = entity["entity_id"]
+
+    LOG.debug("Reading marketplace_item with uuid {}".format(mpi_uuid))
+    res, err = client.market_place.read(mpi_uuid)
+    if err:
+        LOG.error("[{}] - {}".format(err["code"], err["error"]))
+        sys.exit(-1)
+
+    return res.json(), version
+
+
 def describe_marketplace_store_item(
     name, out, version=None, app_source=None, type=None
 ):
@@ -435,24 +520,23 @@ def describe_marketplace_item(
 ):
     """describes the marketplace item"""
 
-    CALM_VERSION = Version.get_version("Calm")
-
     app_states = [app_state] if app_state else []
     if not version:
         LOG.info("Fetching latest version of Marketplace Item {} ".format(name))
-        version = get_mpi_latest_version(
+        mpi, version = get_latest_mpi(
             name=name, app_source=app_source, app_states=app_states, type=type
         )
         LOG.info(version)
 
-    LOG.info("Fetching details of Marketplace Item {}".format(name))
-    mpi = get_mpi_by_name_n_version(
-        name=name,
-        version=version,
-        app_states=app_states,
-        app_source=app_source,
-        type=type,
-    )
+    else:
+        LOG.info("Fetching details of Marketplace Item {}".format(name))
+        mpi = get_mpi_by_name_n_version(
+            name=name,
+            version=version,
+            app_states=app_states,
+            app_source=app_source,
+            type=type,
+        )
 
     if out == "json":
         blueprint = mpi["status"]["resources"]["app_blueprint_template"]
@@ -572,7 +656,7 @@ def launch_marketplace_bp(
         app_source=app_source,
     )
 
-    app_name = app_name or "Mpi-App-{}-{}".format(name, str(uuid.uuid4())[-10:])
+    app_name = app_name or "Mpi-App-{}-{}".format(name, secrets.token_hex(5))
     launch_blueprint_simple(
         patch_editables=patch_editables,
         profile_name=profile_name,
@@ -671,7 +755,6 @@ def launch_marketplace_item(
 
     client = get_api_client()
 
-    CALM_VERSION = Version.get_version("Calm")
     if LV(CALM_VERSION) >= LV("3.2.0"):
         params = {
             "filter": "name=={};type=={}".format(name, MARKETPLACE_ITEM.TYPES.BLUEPRINT)
@@ -700,7 +783,7 @@ def launch_marketplace_item(
         app_source=app_source,
     )
 
-    app_name = app_name or "Mpi-App-{}-{}".format(name, str(uuid.uuid4())[-10:])
+    app_name = app_name or "Mpi-App-{}-{}".format(name, secrets.token_hex(5))
     launch_blueprint_simple(
         patch_editables=patch_editables,
         profile_name=profile_name,
@@ -773,9 +856,7 @@ def convert_mpi_into_blueprint(
         project_ref_list = mpi_data["status"]["resources"].get(
             "project_reference_list", []
         )
-        ref_projects = []
-        for project in project_ref_list:
-            ref_projects.append(project["name"])
+        ref_projects = [project["name"] for project in project_ref_list]
 
         if project_name not in ref_projects:
             LOG.debug("Associated Projects: {}".format(ref_projects))
@@ -792,7 +873,7 @@ def convert_mpi_into_blueprint(
     bp_spec["spec"]["environment_uuid"] = env_uuid
 
     bp_spec["spec"]["app_blueprint_name"] = "Mpi-Bp-{}-{}".format(
-        name, str(uuid.uuid4())[-10:]
+        name, secrets.token_hex(5)
     )
 
     bp_spec["metadata"] = {
@@ -879,7 +960,6 @@ def publish_bp_to_marketplace_manager(
         "metadata": {"kind": "marketplace_item"},
     }
 
-    CALM_VERSION = Version.get_version("Calm")
     if LV(CALM_VERSION) >= LV("3.2.0"):
         bp_template["spec"]["resources"]["type"] = MARKETPLACE_ITEM.TYPES.BLUEPRINT
 
@@ -958,11 +1038,13 @@ def publish_bp_as_new_marketplace_bp(
             marketplace_bp_name
         )
     )
+    # only the filtered count is needed; skip member payloads entirely
     res = get_mpis_group_call(
         name=marketplace_bp_name,
-        group_member_count=1,
+        group_member_count=0,
         app_source=MARKETPLACE_ITEM.SOURCES.LOCAL,
         type=MARKETPLACE_ITEM.TYPES.BLUEPRINT,
+        attributes=[{"attribute": "name"}],
     )
     group_count = res["filtered_group_count"]
 
@@ -1033,6 +1115,7 @@ def publish_bp_as_existing_marketplace_bp(
         group_member_count=1,
         app_source=MARKETPLACE_ITEM.SOURCES.LOCAL,
         type=MARKETPLACE_ITEM.TYPES.BLUEPRINT,
+        attributes=[{"attribute": "name"}],
     )
     group_results = res["group_results"]
     if not group_results:
@@ -1058,22 +1141,26 @@ def publish_bp_as_existing_marketplace_bp(
             MARKETPLACE_ITEM.STATES.PUBLISHED,
             MARKETPLACE_ITEM.STATES.PENDING,
         ],
+        attributes=[{"attribute": "version"}, {"attribute": "app_state"}],
     )
 
     group_results = res["group_results"]
     entity_results = group_results[0]["entity_results"]
 
-    for entity in entity_results:
-        entity_version = get_group_data_value(entity["data"], "version")
-        entity_app_state = get_group_data_value(entity["data"], "app_state")
-
-        if entity_version == version:
-            LOG.error(
-                "An item exists with same version ({}) and app_state ({}) in the chosen app family.".format(
-                    entity_version, entity_app_state
-                )
+    # index versions once and check the clash with a single lookup
+    version_app_state_map = {
+        get_group_data_value(entity["data"], "version"): get_group_data_value(
+            entity["data"], "app_state"
+        )
+        for entity in entity_results
+    }
+    if version in version_app_state_map:
+        LOG.error(
+            "An item exists with same version ({}) and app_state ({}) in the chosen app family.".format(
+                version, version_app_state_map[version]
             )
-            sys.exit(-1)
+        )
+        sys.exit(-1)
 
     publish_bp_to_marketplace_manager(
         bp_name=bp_name,
@@ -1110,6 +1197,53 @@ def publish_bp_as_existing_marketplace_bp(
             )
 
 
+def _prepare_mpi_update_payload(item, app_state=None):
+    """strips read-only fields from a fetched mpi payload and sets the target app state"""
+
+    item.pop("status", None)
+    item["api_version"] = "3.0"
+    if app_state:
+        item["spec"]["resources"]["app_state"] = app_state
+    return item
+
+
+def _set_mpi_category(item_data, category):
+    """validates the supplied app family and stamps it on the item payload"""
+
+    app_families = get_app_family_list()
+    if category not in app_families:
+        LOG.error("{} is not a valid App Family category".format(category))
+        sys.exit(-1)
+
+    item_data["metadata"]["categories"] = {"AppFamily": category}
+
+
+def _get_project_reference_list(client, projects=[], all_projects=False):
+    """resolves project names to references using one name-uuid map fetch"""
+
+    project_name_uuid_map = client.project.get_name_uuid_map(params={"length": 250})
+    if all_projects:
+        return [
+            {"kind": "project", "name": k, "uuid": v}
+            for k, v in project_name_uuid_map.items()
+        ]
+
+    return [
+        {"kind": "project", "name": _project, "uuid": project_name_uuid_map[_project]}
+        for _project in projects
+    ]
+
+
+def _update_mpi(client, item_uuid, item_data):
+    """pushes the updated mpi payload, exiting on api error"""
+
+    res, err = client.market_place.update(uuid=item_uuid, payload=item_data)
+    if err:
+        LOG.error("[{}] - {}".format(err["code"], err["error"]))
+        sys.exit(-1)
+    return res
+
+
 def approve_marketplace_item(
     name,
     version=None,
@@ -1145,7 +1279,6 @@ def approve_marketplace_item(
     )
     item_uuid = item["metadata"]["uuid"]
     item_type = MARKETPLACE_ITEM.TYPES.BLUEPRINT
-    CALM_VERSION = Version.get_version("Calm")
     if LV(CALM_VERSION) >= LV("3.2.0"):
         item_type = item["status"]["resources"]["type"]
 
@@ -1157,47 +1290,26 @@ def approve_marketplace_item(
             LOG.error("Item is in {} state. Unable to approve it".format(item_status))
             sys.exit(-1)
 
-    res, err = client.market_place.read(item_uuid)
-    if err:
-        LOG.error("[{}] - {}".format(err["code"], err["error"]))
-        sys.exit(-1)
-
-    item_data = res.json()
-    item_data.pop("status", None)
-    item_data["api_version"] = "3.0"
-    item_data["spec"]["resources"]["app_state"] = MARKETPLACE_ITEM.STATES.ACCEPTED
+    # the fetch above already returned the full read payload; no second read
+    item_data = _prepare_mpi_update_payload(
+        item, app_state=MARKETPLACE_ITEM.STATES.ACCEPTED
+    )
 
     if category:
-        app_families = get_app_family_list()
-        if category not in app_families:
-            LOG.error("{} is not a valid App Family category".format(category))
-            sys.exit(-1)
-
-        item_data["metadata"]["categories"] = {"AppFamily": category}
+        _set_mpi_category(item_data, category)
 
     if not item_data["spec"]["resources"].get("project_reference_list", {}):
         item_data["spec"]["resources"]["project_reference_list"] = []
 
-    project_name_uuid_map = client.project.get_name_uuid_map(params={"length": 250})
     if all_projects:
-        for k, v in project_name_uuid_map.items():
-            item_data["spec"]["resources"]["project_reference_list"].append(
-                {
-                    "kind": "project",
-                    "name": k,
-                    "uuid": v,
-                }
-            )
+        item_data["spec"]["resources"]["project_reference_list"].extend(
+            _get_project_reference_list(client, all_projects=True)
+        )
 
     else:
-        for _project in projects:
-            item_data["spec"]["resources"]["project_reference_list"].append(
-                {
-                    "kind": "project",
-                    "name": _project,
-                    "uuid": project_name_uuid_map[_project],
-                }
-            )
+        item_data["spec"]["resources"]["project_reference_list"].extend(
+            _get_project_reference_list(client, projects=projects)
+        )
         for _project in remove_projects:
             project_valid = False
             for index, project_detail in enumerate(
@@ -1219,10 +1331,7 @@ def approve_marketplace_item(
     if item_type == MARKETPLACE_ITEM.TYPES.BLUEPRINT:
         LOG.warning(MARKETPLACE_ITEM.WARN_MSG)
 
-    res, err = client.market_place.update(uuid=item_uuid, payload=item_data)
-    if err:
-        LOG.error("[{}] - {}".format(err["code"], err["error"]))
-        sys.exit(-1)
+    _update_mpi(client, item_uuid, item_data)
 
     LOG.info(
         "Marketplace Item {} with version {} is approved successfully".format(
@@ -1247,7 +1356,7 @@ def publish_marketplace_item(
         LOG.info(
             "Fetching latest version of accepted Marketplace Item {} ".format(name)
         )
-        version = get_mpi_latest_version(
+        item, version = get_latest_mpi(
             name=name,
             app_states=[MARKETPLACE_ITEM.STATES.ACCEPTED],
             app_source=app_source,
@@ -1255,21 +1364,21 @@ def publish_marketplace_item(
         )
         LOG.info(version)
 
-    LOG.info(
-        "Fetching details of accepted marketplace item {} with version {}".format(
-            name, version
+    else:
+        LOG.info(
+            "Fetching details of accepted marketplace item {} with version {}".format(
+                name, version
+            )
+        )
+        item = get_mpi_by_name_n_version(
+            name=name,
+            version=version,
+            app_source=app_source,
+            app_states=[MARKETPLACE_ITEM.STATES.ACCEPTED],
+            type=type,
         )
-    )
-    item = get_mpi_by_name_n_version(
-        name=name,
-        version=version,
-        app_source=app_source,
-        app_states=[MARKETPLACE_ITEM.STATES.ACCEPTED],
-        type=type,
-    )
     item_uuid = item["metadata"]["uuid"]
     item_type = MARKETPLACE_ITEM.TYPES.BLUEPRINT
-    CALM_VERSION = Version.get_version("Calm")
     if LV(CALM_VERSION) >= LV("3.2.0"):
         item_type = item["status"]["resources"]["type"]
 
@@ -1285,57 +1394,28 @@ def publish_marketplace_item(
             )
             sys.exit(-1)
 
-    res, err = client.market_place.read(item_uuid)
-    if err:
-        LOG.error("[{}] - {}".format(err["code"], err["error"]))
-        sys.exit(-1)
-
-    item_data = res.json()
-    item_data.pop("status", None)
-    item_data["api_version"] = "3.0"
-    item_data["spec"]["resources"]["app_state"] = MARKETPLACE_ITEM.STATES.PUBLISHED
+    # the fetch above already returned the full read payload; no second read
+    item_data = _prepare_mpi_update_payload(
+        item, app_state=MARKETPLACE_ITEM.STATES.PUBLISHED
+    )
 
     if category:
-        app_families = get_app_family_list()
-        if category not in app_families:
-            LOG.error("{} is not a valid App Family category".format(category))
-            sys.exit(-1)
-
-        item_data["metadata"]["categories"] = {"AppFamily": category}
+        _set_mpi_category(item_data, category)
 
     if projects or all_projects:
-        # Clear the stored projects
-        item_data["spec"]["resources"]["project_reference_list"] = []
-        project_name_uuid_map = client.project.get_name_uuid_map(params={"length": 250})
-
-        if all_projects:
-            for k, v in project_name_uuid_map.items():
-                item_data["spec"]["resources"]["project_reference_list"].append(
-                    {
-                        "kind": "project",
-                        "name": k,
-                        "uuid": v,
-                    }
-                )
-        else:
-            for _project in projects:
-                item_data["spec"]["resources"]["project_reference_list"].append(
-                    {
-                        "kind": "project",
-                        "name": _project,
-                        "uuid": project_name_uuid_map[_project],
-                    }
-                )
+        # Replace the stored projects
+        item_data["spec"]["resources"][
+            "project_reference_list"
+        ] = _get_project_reference_list(
+            client, projects=projects, all_projects=all_projects
+        )
 
     # Atleast 1 project required for publishing to marketplace
     if not item_data["spec"]["resources"].get("project_reference_list", None):
         LOG.error("To publish to the Marketplace, please provide a project first.")
         sys.exit(-1)
 
-    res, err = client.market_place.update(uuid=item_uuid, payload=item_data)
-    if err:
-        LOG.error("[{}] - {}".format(err["code"], err["error"]))
-        sys.exit(-1)
+    _update_mpi(client, item_uuid, item_data)
 
     LOG.info("Marketplace Item is published to marketplace successfully")
 
@@ -1373,62 +1453,31 @@ def update_marketplace_item(
     )
     item_uuid = mpi_data["metadata"]["uuid"]
 
-    res, err = client.market_place.read(item_uuid)
-    if err:
-        LOG.error("[{}] - {}".format(err["code"], err["error"]))
-        sys.exit(-1)
+    item_type = MARKETPLACE_ITEM.TYPES.BLUEPRINT
+    if LV(CALM_VERSION) >= LV("3.2.0"):
+        item_type = mpi_data["status"]["resources"]["type"]
 
-    item_data = res.json()
-    item_data.pop("status", None)
-    item_data["api_version"] = "3.0"
+    # the fetch above already returned the full read payload; no second read
+    item_data = _prepare_mpi_update_payload(mpi_data)
 
     if category:
-        app_families = get_app_family_list()
-        if category not in app_families:
-            LOG.error("{} is not a valid App Family category".format(category))
-            sys.exit(-1)
-
-        item_data["metadata"]["categories"] = {"AppFamily": category}
+        _set_mpi_category(item_data, category)
 
     if projects or all_projects:
-        # Clear the stored projects
-        item_data["spec"]["resources"]["project_reference_list"] = []
-        project_name_uuid_map = client.project.get_name_uuid_map(params={"length": 250})
-
-        if all_projects:
-            for k, v in project_name_uuid_map.items():
-                item_data["spec"]["resources"]["project_reference_list"].append(
-                    {
-                        "kind": "project",
-                        "name": k,
-                        "uuid": v,
-                    }
-                )
-        else:
-            for _project in projects:
-                item_data["spec"]["resources"]["project_reference_list"].append(
-                    {
-                        "kind": "project",
-                        "name": _project,
-                        "uuid": project_name_uuid_map[_project],
-                    }
-                )
+        # Replace the stored projects
+        item_data["spec"]["resources"][
+            "project_reference_list"
+        ] = _get_project_reference_list(
+            client, projects=projects, all_projects=all_projects
+        )
 
     if description:
         item_data["spec"]["description"] = description
 
-    item_type = MARKETPLACE_ITEM.TYPES.BLUEPRINT
-    CALM_VERSION = Version.get_version("Calm")
-    if LV(CALM_VERSION) >= LV("3.2.0"):
-        item_type = mpi_data["status"]["resources"]["type"]
-
     if item_type == MARKETPLACE_ITEM.TYPES.BLUEPRINT:
         LOG.warning(MARKETPLACE_ITEM.WARN_MSG)
 
-    res, err = client.market_place.update(uuid=item_uuid, payload=item_data)
-    if err:
-        LOG.error("[{}] - {}".format(err["code"], err["error"]))
-        sys.exit(-1)
+    _update_mpi(client, item_uuid, item_data)
 
     LOG.info(
         "Marketplace Item {} with version {} is updated successfully".format(
@@ -1494,41 +1543,34 @@ def reject_marketplace_item(name, version, type=None):
     if not version:
         # Search for pending items, Only those items can be rejected
         LOG.info("Fetching latest version of pending Marketplace Item {} ".format(name))
-        version = get_mpi_latest_version(
+        item, version = get_latest_mpi(
             name=name,
             app_states=[MARKETPLACE_ITEM.STATES.PENDING],
             type=type,
         )
         LOG.info(version)
 
-    # Pending BP will always of type LOCAL, so no need to apply that filter
-    LOG.info(
-        "Fetching details of pending marketplace item {} with version {}".format(
-            name, version
+    else:
+        # Pending BP will always of type LOCAL, so no need to apply that filter
+        LOG.info(
+            "Fetching details of pending marketplace item {} with version {}".format(
+                name, version
+            )
+        )
+        item = get_mpi_by_name_n_version(
+            name=name,
+            version=version,
+            app_states=[MARKETPLACE_ITEM.STATES.PENDING],
+            type=type,
         )
-    )
-    item = get_mpi_by_name_n_version(
-        name=name,
-        version=version,
-        app_states=[MARKETPLACE_ITEM.STATES.PENDING],
-        type=type,
-    )
     item_uuid = item["metadata"]["uuid"]
 
-    res, err = client.market_place.read(item_uuid)
-    if err:
-        LOG.error("[{}] - {}".format(err["code"], err["error"]))
-        sys.exit(-1)
-
-    item_data = res.json()
-    item_data.pop("status", None)
-    item_data["api_version"] = "3.0"
-    item_data["spec"]["resources"]["app_state"] = MARKETPLACE_ITEM.STATES.REJECTED
+    # the fetch above already returned the full read payload; no second read
+    item_data = _prepare_mpi_update_payload(
+        item, app_state=MARKETPLACE_ITEM.STATES.REJECTED
+    )
 
-    res, err = client.market_place.update(uuid=item_uuid, payload=item_data)
-    if err:
-        LOG.error("[{}] - {}".format(err["code"], err["error"]))
-        sys.exit(-1)
+    _update_mpi(client, item_uuid, item_data)
 
     LOG.info(
         "Marketplace Item {} with version {} is rejected successfully".format(
@@ -1568,6 +1610,19 @@ def unpublish_marketplace_item(
         )
         versions.append(version)
 
+    # resolve and validate the supplied projects once, not once per version
+    project_name_uuid_map = {}
+    if projects:
+        project_name_uuid_map = client.project.get_name_uuid_map(params={"length": 250})
+        for project in projects:
+            if project not in project_name_uuid_map:
+                LOG.error(
+                    "Project {} does not exist in system to unpublish from MPI".format(
+                        project
+                    )
+                )
+                sys.exit(-1)
+
     for version in versions:
         LOG.info(
             "Fetching details of published marketplace item {} with version {}".format(
@@ -1583,28 +1638,10 @@ def unpublish_marketplace_item(
         )
         item_uuid = item["metadata"]["uuid"]
 
-        res, err = client.market_place.read(item_uuid)
-        if err:
-            LOG.error("[{}] - {}".format(err["code"], err["error"]))
-            sys.exit(-1)
-
-        item_data = res.json()
-        item_data.pop("status", None)
-        item_data["api_version"] = "3.0"
+        # the fetch above already returned the full read payload; no second read
+        item_data = _prepare_mpi_update_payload(item)
         if projects:
-            project_name_uuid_map = client.project.get_name_uuid_map(
-                params={"length": 250}
-            )
             for project in projects:
-                # Validating the given projects
-                if project not in project_name_uuid_map:
-                    LOG.error(
-                        "Project {} does not exist in system to unpublish from MPI".format(
-                            project
-                        )
-                    )
-                    sys.exit(-1)
-
                 project_valid = False
                 for index, project_detail in enumerate(
                     item_data["spec"]["resources"]["project_reference_list"]
@@ -1629,10 +1666,7 @@ def unpublish_marketplace_item(
                 "app_state"
             ] = MARKETPLACE_ITEM.STATES.ACCEPTED
 
-        res, err = client.market_place.update(uuid=item_uuid, payload=item_data)
-        if err:
-            LOG.error("[{}] - {}".format(err["code"], err["error"]))
-            sys.exit(-1)
+        _update_mpi(client, item_uuid, item_data)
         additional_log = (
             "from projects {}".format(", ".join(projects)) if projects else ""
         )
@@ -1653,7 +1687,7 @@ def unpublish_marketplace_bp(
         LOG.info(
             "Fetching latest version of published Marketplace Item {} ".format(name)
         )
-        version = get_mpi_latest_version(
+        mpi_item, version = get_latest_mpi(
             name=name,
             app_states=[MARKETPLACE_ITEM.STATES.PUBLISHED],
             app_source=app_source,
@@ -1661,21 +1695,21 @@ def unpublish_marketplace_bp(
         )
         LOG.info(version)
 
-    LOG.info(
-        "Fetching details of published marketplace blueprint {} with version {}".format(
-            name, version
+    else:
+        LOG.info(
+            "Fetching details of published marketplace blueprint {} with version {}".format(
+                name, version
+            )
+        )
+        mpi_item = get_mpi_by_name_n_version(
+            name=name,
+            version=version,
+            app_states=[MARKETPLACE_ITEM.STATES.PUBLISHED],
+            app_source=app_source,
+            type=MARKETPLACE_ITEM.TYPES.BLUEPRINT,
         )
-    )
-    mpi_item = get_mpi_by_name_n_version(
-        name=name,
-        version=version,
-        app_states=[MARKETPLACE_ITEM.STATES.PUBLISHED],
-        app_source=app_source,
-        type=MARKETPLACE_ITEM.TYPES.BLUEPRINT,
-    )
 
     item_type = MARKETPLACE_ITEM.TYPES.BLUEPRINT
-    CALM_VERSION = Version.get_version("Calm")
     if LV(CALM_VERSION) >= LV("3.2.0"):
         item_type = mpi_item["status"]["resources"]["type"]
 
@@ -1815,10 +1849,12 @@ def publish_runbook_as_new_marketplace_item(
             marketplace_item_name
         )
     )
+    # only the filtered count is needed; skip member payloads entirely
     res = get_mpis_group_call(
         name=marketplace_item_name,
-        group_member_count=1,
+        group_member_count=0,
         app_source=MARKETPLACE_ITEM.SOURCES.LOCAL,
+        attributes=[{"attribute": "name"}],
     )
     group_count = res["filtered_group_count"]
 
@@ -1890,6 +1926,7 @@ def publish_runbook_as_existing_marketplace_item(
         name=marketplace_item_name,
         group_member_count=1,
         app_source=MARKETPLACE_ITEM.SOURCES.LOCAL,
+        attributes=[{"attribute": "name"}],
     )
     group_results = res["group_results"]
     if not group_results:
@@ -1917,22 +1954,26 @@ def publish_runbook_as_existing_marketplace_item(
             MARKETPLACE_ITEM.STATES.PUBLISHED,
             MARKETPLACE_ITEM.STATES.PENDING,
         ],
+        attributes=[{"attribute": "version"}, {"attribute": "app_state"}],
     )
 
     group_results = res["group_results"]
     entity_results = group_results[0]["entity_results"]
 
-    for entity in entity_results:
-        entity_version = get_group_data_value(entity["data"], "version")
-        entity_app_state = get_group_data_value(entity["data"], "app_state")
-
-        if entity_version == version:
-            LOG.error(
-                "An item exists with same version ({}) and app_state ({}) in the chosen app family.".format(
-                    entity_version, entity_app_state
-                )
+    # index versions once and check the clash with a single lookup
+    version_app_state_map = {
+        get_group_data_value(entity["data"], "version"): get_group_data_value(
+            entity["data"], "app_state"
+        )
+        for entity in entity_results
+    }
+    if version in version_app_state_map:
+        LOG.error(
+            "An item exists with same version ({}) and app_state ({}) in the chosen app family.".format(
+                version, version_app_state_map[version]
             )
-            sys.exit(-1)
+        )
+        sys.exit(-1)
 
     publish_runbook_to_marketplace_manager(
         runbook_name=runbook_name,
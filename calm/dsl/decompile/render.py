@@ -1,12 +1,19 @@
-from jinja2 import Environment, PackageLoader
+from jinja2 import Environment, FileSystemBytecodeCache, PackageLoader
+
+# Single shared environment; jinja keeps each compiled schema in its template
+# cache, so repeated renders skip the parse/compile step entirely. The
+# bytecode cache directory is left to jinja, which creates a per-user one
+# with restricted permissions.
+_template_env = Environment(
+    loader=PackageLoader(__name__, "schemas"),
+    auto_reload=False,
+    bytecode_cache=FileSystemBytecodeCache(),
+)
 
 
 def get_template(schema_file):
 
-    loader = PackageLoader(__name__, "schemas")
-    env = Environment(loader=loader)
-    template = env.get_template(schema_file)
-    return template
+    return _template_env.get_template(schema_file)
 
 
 def render_template(schema_file, obj):
@@ -1,6 +1,7 @@
-from ruamel import yaml
 import os
 
+import yaml
+
 from calm.dsl.decompile.render import render_template
 from calm.dsl.decompile.action import render_action_template
 from calm.dsl.decompile.readiness_probe import render_readiness_probe_template
@@ -12,11 +13,21 @@ from calm.dsl.log import get_logging_handle
 
 LOG = get_logging_handle(__name__)
 
+# libyaml-backed dumper when available, pure-python safe dumper otherwise
+_YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# Reverse maps from runbook name to action name, shared across substrates
+_SYSTEM_ACTIONS = {v: k for k, v in SubstrateType.ALLOWED_FRAGMENT_ACTIONS.items()}
+_POWER_ACTIONS = {v: k for k, v in SubstrateType.ALLOWED_SYSTEM_ACTIONS.items()}
+
 
 def render_substrate_template(
-    cls, vm_images=[], secrets_dict=[], endpoints=[], ep_list=[]
+    cls, vm_images=None, secrets_dict=[], endpoints=[], ep_list=[]
 ):
 
+    if vm_images is None:
+        vm_images = []
+
     LOG.debug("Rendering {} substrate template".format(cls.__name__))
     if not isinstance(cls, SubstrateType):
         raise TypeError("{} is not of type {}".format(cls, SubstrateType))
@@ -67,8 +78,13 @@ def render_substrate_template(
         )
 
         # Write editable spec to separate file
-        with open(file_location, "w+") as fd:
-            fd.write(yaml.dump(create_spec_editables, default_flow_style=False))
+        with open(file_location, "w") as fd:
+            yaml.dump(
+                create_spec_editables,
+                fd,
+                default_flow_style=False,
+                Dumper=_YAML_DUMPER,
+            )
 
     # Handle provider_spec for substrate
     provider_spec = cls.provider_spec
@@ -105,20 +121,18 @@ def render_substrate_template(
 
         # Write provider spec to separate file
         file_location = os.path.join(spec_dir, provider_spec_file_name)
-        with open(file_location, "w+") as fd:
-            fd.write(yaml.dump(provider_spec, default_flow_style=False))
+        with open(file_location, "w") as fd:
+            yaml.dump(provider_spec, fd, default_flow_style=False, Dumper=_YAML_DUMPER)
 
     # Actions
     action_list = []
-    system_actions = {v: k for k, v in SubstrateType.ALLOWED_FRAGMENT_ACTIONS.items()}
-    power_actions = {v: k for k, v in SubstrateType.ALLOWED_SYSTEM_ACTIONS.items()}
     for action in user_attrs.get("actions", []):
-        if action.__name__ in list(system_actions.keys()):
-            action.name = system_actions[action.__name__]
-            action.__name__ = system_actions[action.__name__]
-        elif action.__name__ in list(power_actions.keys()):
-            action.name = power_actions[action.__name__]
-            action.__name__ = power_actions[action.__name__]
+        if action.__name__ in _SYSTEM_ACTIONS:
+            action.name = _SYSTEM_ACTIONS[action.__name__]
+            action.__name__ = _SYSTEM_ACTIONS[action.__name__]
+        elif action.__name__ in _POWER_ACTIONS:
+            action.name = _POWER_ACTIONS[action.__name__]
+            action.__name__ = _POWER_ACTIONS[action.__name__]
         action_list.append(
             render_action_template(
                 action,
@@ -159,12 +173,11 @@ def get_provider_spec_string(spec, filename, provider_type, vm_images):
                     )
                     data_source_ref.pop("uuid", None)
 
-        disk_pkg_string = ""
-        for k, v in disk_ind_img_map.items():
-            disk_pkg_string += ",{}: {}".format(k, v)
-        if disk_pkg_string.startswith(","):
-            disk_pkg_string = disk_pkg_string[1:]
-        disk_pkg_string = "{" + disk_pkg_string + "}"
+        disk_pkg_string = (
+            "{"
+            + ",".join("{}: {}".format(k, v) for k, v in disk_ind_img_map.items())
+            + "}"
+        )
 
         res = "read_ahv_spec({}, disk_packages = {})".format(
             dsl_file_location_alias, disk_pkg_string
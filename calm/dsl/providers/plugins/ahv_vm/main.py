@@ -5,9 +5,10 @@ import json
 import copy
 import os
 
-from ruamel import yaml
+import yaml
 from distutils.version import LooseVersion as LV
 from collections import OrderedDict
+from functools import lru_cache
 
 from calm.dsl.api import get_resource_api, get_api_client
 from calm.dsl.providers import get_provider_interface
@@ -22,6 +23,9 @@ from calm.dsl.constants import CACHE
 LOG = get_logging_handle(__name__)
 Provider = get_provider_interface()
 
+# libyaml-backed dumper when available, pure-python safe dumper otherwise
+_YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
 
 # Implements Provider interface for AHV_VM
 class AhvVmProvider(Provider):
@@ -940,18 +944,24 @@ class AhvVmProvider(Provider):
         # TODO remove this mess
         from calm.dsl.store.version import Version
 
-        calm_version = Version.get_version("Calm")
-        api_handlers = AhvBase.api_handlers
+        api_handler = _get_api_handler(Version.get_version("Calm"))
+        return api_handler(client.connection)
+
 
-        # Return min version that is greater or equal to user calm version
-        supported_versions = []
-        for k in api_handlers.keys():
-            if LV(k) <= LV(calm_version):
-                supported_versions.append(k)
+@lru_cache(maxsize=None)
+def _get_api_handler(calm_version):
+    """returns latest api handler class supported on given calm version"""
 
-        latest_version = max(supported_versions, key=lambda x: LV(x))
-        api_handler = api_handlers[latest_version]
-        return api_handler(client.connection)
+    api_handlers = AhvBase.api_handlers
+
+    # Return min version that is greater or equal to user calm version
+    supported_versions = []
+    for k in api_handlers.keys():
+        if LV(k) <= LV(calm_version):
+            supported_versions.append(k)
+
+    latest_version = max(supported_versions, key=lambda x: LV(x))
+    return api_handlers[latest_version]
 
 
 class AhvBase:
@@ -1009,18 +1019,28 @@ class AhvNew(AhvBase):
     def __init__(self, connection):
         self.connection = connection
 
+        # resource api wrappers are fixed per connection; build them once
+        self._images_api = get_resource_api(self.IMAGES, connection)
+        self._subnets_api = get_resource_api(self.SUBNETS, connection)
+        self._clusters_api = get_resource_api(self.CLUSTERS, connection)
+        self._vpcs_api = get_resource_api(self.VPCS, connection)
+        self._groups_api = get_resource_api(self.GROUPS, connection)
+        self._pc_groups_api = get_resource_api("groups", connection)
+
     def images(self, *args, **kwargs):
-        Obj = get_resource_api(self.IMAGES, self.connection)
+        Obj = self._images_api
         limit = kwargs.get("length", 250)
         offset = kwargs.get("offset", 0)
         filter_query = kwargs.get("filter_query", "")
 
         account_uuid = kwargs.get("account_uuid", None)
         if account_uuid:
-            filter_query = filter_query + ";account_uuid=={}".format(account_uuid)
-
-        if filter_query.startswith(";"):
-            filter_query = filter_query[1:]
+            account_filter = "account_uuid=={}".format(account_uuid)
+            filter_query = (
+                "{};{}".format(filter_query, account_filter)
+                if filter_query
+                else account_filter
+            )
 
         params = {"length": limit, "offset": offset, "filter": filter_query}
         res, err = Obj.list(params, ignore_error=True)
@@ -1031,17 +1051,19 @@ class AhvNew(AhvBase):
         return res
 
     def subnets(self, *args, **kwargs):
-        Obj = get_resource_api(self.SUBNETS, self.connection)
+        Obj = self._subnets_api
         limit = kwargs.get("length", 250)
         offset = kwargs.get("offset", 0)
         filter_query = kwargs.get("filter_query", "")
 
         account_uuid = kwargs.get("account_uuid", None)
         if account_uuid:
-            filter_query = filter_query + ";account_uuid=={}".format(account_uuid)
-
-        if filter_query.startswith(";"):
-            filter_query = filter_query[1:]
+            account_filter = "account_uuid=={}".format(account_uuid)
+            filter_query = (
+                "{};{}".format(filter_query, account_filter)
+                if filter_query
+                else account_filter
+            )
 
         params = {"length": limit, "offset": offset, "filter": filter_query}
         res, err = Obj.list_all(base_params=params, ignore_error=True)
@@ -1057,11 +1079,11 @@ class AhvNew(AhvBase):
         # Note: Api response is bugged due to CALM-17213
         # TODO: Remove dependecy for host_pc after bug is resolved
         if host_pc:
-            Obj = get_resource_api("groups", self.connection)
+            Obj = self._pc_groups_api
             res, err = Obj.create(payload)
 
         else:
-            Obj = get_resource_api(self.GROUPS, self.connection)
+            Obj = self._groups_api
             account_uuid = kwargs.get("account_uuid", None)
             if account_uuid:
                 payload["filter_criteria"] = payload[
@@ -1077,24 +1099,27 @@ class AhvNew(AhvBase):
         categories = []
         for group in res["group_results"]:
             key = group["group_summaries"]["sum:name"]["values"][0]["values"][0]
-            for entity in group["entity_results"]:
-                value = entity["data"][0]["values"][0]["values"][0]
-                categories.append({"key": key, "value": value})
+            categories.extend(
+                {"key": key, "value": entity["data"][0]["values"][0]["values"][0]}
+                for entity in group["entity_results"]
+            )
 
         return categories
 
     def clusters(self, *args, **kwargs):
-        Obj = get_resource_api(self.CLUSTERS, self.connection)
+        Obj = self._clusters_api
         limit = kwargs.get("length", 250)
         offset = kwargs.get("offset", 0)
         filter_query = kwargs.get("filter_query", "")
 
         account_uuid = kwargs.get("account_uuid", None)
         if account_uuid:
-            filter_query = filter_query + ";account_uuid=={}".format(account_uuid)
-
-        if filter_query.startswith(";"):
-            filter_query = filter_query[1:]
+            account_filter = "account_uuid=={}".format(account_uuid)
+            filter_query = (
+                "{};{}".format(filter_query, account_filter)
+                if filter_query
+                else account_filter
+            )
 
         params = {"length": limit, "offset": offset, "filter": filter_query}
         res, err = Obj.list(params, ignore_error=True)
@@ -1105,7 +1130,7 @@ class AhvNew(AhvBase):
         return res
 
     def vpcs(self, *args, **kwargs):
-        Obj = get_resource_api(self.VPCS, self.connection)
+        Obj = self._vpcs_api
         limit = kwargs.get("length", 500)
         offset = kwargs.get("offset", 0)
         ignore_failures = kwargs.get("ignore_failures", False)
@@ -1114,10 +1139,12 @@ class AhvNew(AhvBase):
 
         account_uuid = kwargs.get("account_uuid", None)
         if account_uuid:
-            filter_query = filter_query + ";account_uuid=={}".format(account_uuid)
-
-        if filter_query.startswith(";"):
-            filter_query = filter_query[1:]
+            account_filter = "account_uuid=={}".format(account_uuid)
+            filter_query = (
+                "{};{}".format(filter_query, account_filter)
+                if filter_query
+                else account_filter
+            )
 
         params = {"length": limit, "offset": offset, "filter": filter_query}
         LOG.debug(params)
@@ -1159,8 +1186,13 @@ class Ahv(AhvBase):
     def __init__(self, connection):
         self.connection = connection
 
+        # resource api wrappers are fixed per connection; build them once
+        self._images_api = get_resource_api(self.IMAGES, connection)
+        self._subnets_api = get_resource_api(self.SUBNETS, connection)
+        self._groups_api = get_resource_api(self.GROUPS, connection)
+
     def images(self, *args, **kwargs):
-        Obj = get_resource_api(self.IMAGES, self.connection)
+        Obj = self._images_api
         limit = kwargs.get("length", 250)
         offset = kwargs.get("offset", 0)
         filter_query = kwargs.get("filter_query", "")
@@ -1174,7 +1206,7 @@ class Ahv(AhvBase):
         return res
 
     def subnets(self, *args, **kwargs):
-        Obj = get_resource_api(self.SUBNETS, self.connection)
+        Obj = self._subnets_api
         limit = kwargs.get("length", 250)
         offset = kwargs.get("offset", 0)
         filter_query = kwargs.get("filter_query", "")
@@ -1187,8 +1219,9 @@ class Ahv(AhvBase):
         return {"entities": res}
 
     def categories(self, *args, **kwargs):
-        Obj = get_resource_api(self.GROUPS, self.connection)
-        payload = self.CATEGORIES_PAYLOAD
+        Obj = self._groups_api
+        # copy so the class-level template is never handed out for mutation
+        payload = copy.deepcopy(self.CATEGORIES_PAYLOAD)
 
         res, err = Obj.create(payload)
         if err:
@@ -1198,13 +1231,22 @@ class Ahv(AhvBase):
         categories = []
         for group in res["group_results"]:
             key = group["group_summaries"]["sum:name"]["values"][0]["values"][0]
-            for entity in group["entity_results"]:
-                value = entity["data"][0]["values"][0]["values"][0]
-                categories.append({"key": key, "value": value})
+            categories.extend(
+                {"key": key, "value": entity["data"][0]["values"][0]["values"][0]}
+                for entity in group["entity_results"]
+            )
 
         return categories
 
 
+def _prompt_for_index(msg, count, default=1):
+    """prompts till a valid index in [1, count] is entered; click re-prompts on bad input"""
+
+    return click.prompt(
+        "\n{}".format(msg), type=click.IntRange(1, count), default=default
+    )
+
+
 def highlight_text(text, **kwargs):
     """Highlight text in our standard format"""
     return click.style("{}".format(text), fg="blue", bold=False, **kwargs)
@@ -1231,37 +1273,31 @@ def create_spec(client):
     for ind, name in enumerate(project_list):
         click.echo("\t {}. {}".format(str(ind + 1), highlight_text(name)))
 
-    project_name = ""
-    project_id = ""
-    while True:
-        ind = click.prompt("\nEnter the index of project", default=1)
-        if (ind > len(project_list)) or (ind <= 0):
-            click.echo("Invalid index !!! ")
-
-        else:
-            project_name = project_list[ind - 1]
-            project_id = projects[project_list[ind - 1]]
-            click.echo("{} selected".format(highlight_text(project_name)))
-            break
+    ind = _prompt_for_index("Enter the index of project", len(project_list))
+    project_name = project_list[ind - 1]
+    project_id = projects[project_name]
+    click.echo("{} selected".format(highlight_text(project_name)))
 
     res, err = client.project.read(project_id)
     if err:
         raise Exception("[{}] - {}".format(err["code"], err["error"]))
 
     project = res.json()
-    subnets_list = []
-    for subnet in project["status"]["resources"]["subnet_reference_list"]:
-        subnets_list.append(subnet["uuid"])
+    subnets_list = [
+        subnet["uuid"]
+        for subnet in project["status"]["resources"]["subnet_reference_list"]
+    ]
 
     # Extending external subnet's list from remote account
-    for subnet in project["status"]["resources"].get("external_network_list", []):
-        subnets_list.append(subnet["uuid"])
+    subnets_list.extend(
+        subnet["uuid"]
+        for subnet in project["status"]["resources"].get("external_network_list", [])
+    )
 
     accounts = project["status"]["resources"]["account_reference_list"]
 
-    reg_accounts = []
-    for account in accounts:
-        reg_accounts.append(account["uuid"])
+    # set for O(1) membership tests against the listed pc accounts
+    reg_accounts = {account["uuid"] for account in accounts}
 
     # As account_uuid is required for versions>2.9.0
     account_uuid = ""
@@ -1287,16 +1323,9 @@ def create_spec(client):
                 "\t {}. {}".format(str(ind + 1), highlight_text(account["name"]))
             )
 
-        while True:
-            ind = click.prompt("\nEnter the index of account", default=1)
-            if (ind > len(accounts)) or (ind <= 0):
-                click.echo("Invalid index !!! ")
-            else:
-                account_uuid = accounts[ind - 1]["uuid"]
-                click.echo(
-                    "{} selected".format(highlight_text(accounts[ind - 1]["name"]))
-                )
-                break
+        ind = _prompt_for_index("Enter the index of account", len(accounts))
+        account_uuid = accounts[ind - 1]["uuid"]
+        click.echo("{} selected".format(highlight_text(accounts[ind - 1]["name"])))
     elif len(accounts) == 1:
         account_uuid = accounts[0]["uuid"]
 
@@ -1338,14 +1367,9 @@ def create_spec(client):
             result = {}
             while True:
 
-                while True:
-                    index = click.prompt("\nEnter the index of category", default=1)
-                    if (index > len(categories)) or (index <= 0):
-                        click.echo("Invalid index !!! ")
-
-                    else:
-                        break
-
+                index = _prompt_for_index(
+                    "Enter the index of category", len(categories)
+                )
                 group = categories[index - 1]
                 key = group["key"]
                 if result.get(key) is not None:
@@ -1408,6 +1432,28 @@ def create_spec(client):
     path[-1] = "disk_list"
     option.append("AHV Disk")
 
+    # Fetch images once and bucket them by image type; every disk iteration
+    # then just picks the map for its device type
+    res = AhvObj.images(account_uuid=account_uuid)
+    images_by_type = {}
+    for entity in res.get("entities", []):
+        img_type = entity["status"]["resources"].get("image_type", None)
+
+        # Ignoring images, if they don't have any image type(Ex: Karbon Image)
+        if not img_type:
+            continue
+
+        images_by_type.setdefault(img_type, {})[entity["status"]["name"]] = entity[
+            "metadata"
+        ]["uuid"]
+
+    # These option lists are invariant; build them once for all iterations
+    device_types = list(AhvConstants.DEVICE_TYPES.keys())
+    device_bus_lists = {
+        device_type: list(bus_map.keys())
+        for device_type, bus_map in AhvConstants.DEVICE_BUS.items()
+    }
+
     adapter_name_index_map = {}
     image_index = 0
     while True:
@@ -1418,69 +1464,42 @@ def create_spec(client):
         )
 
         click.echo("\nChoose from given Device Types :")
-        device_types = list(AhvConstants.DEVICE_TYPES.keys())
         for index, device_type in enumerate(device_types):
             click.echo("\t{}. {}".format(index + 1, highlight_text(device_type)))
 
-        while True:
-            res = click.prompt("\nEnter the index for Device Type", default=1)
-            if (res > len(device_types)) or (res <= 0):
-                click.echo("Invalid index !!! ")
-
-            else:
-                image["device_type"] = AhvConstants.DEVICE_TYPES[device_types[res - 1]]
-                click.echo("{} selected".format(highlight_text(image["device_type"])))
-                break
+        res = _prompt_for_index("Enter the index for Device Type", len(device_types))
+        image["device_type"] = AhvConstants.DEVICE_TYPES[device_types[res - 1]]
+        click.echo("{} selected".format(highlight_text(image["device_type"])))
 
         click.echo("\nChoose from given Device Bus :")
-        device_bus_list = list(AhvConstants.DEVICE_BUS[image["device_type"]].keys())
+        device_bus_list = device_bus_lists[image["device_type"]]
         for index, device_bus in enumerate(device_bus_list):
             click.echo("\t{}. {}".format(index + 1, highlight_text(device_bus)))
 
-        while True:
-            res = click.prompt("\nEnter the index for Device Bus", default=1)
-            if (res > len(device_bus_list)) or (res <= 0):
-                click.echo("Invalid index !!! ")
-
-            else:
-                image["adapter_type"] = AhvConstants.DEVICE_BUS[image["device_type"]][
-                    device_bus_list[res - 1]
-                ]
-                click.echo("{} selected".format(highlight_text(image["adapter_type"])))
-                break
+        res = _prompt_for_index("Enter the index for Device Bus", len(device_bus_list))
+        image["adapter_type"] = AhvConstants.DEVICE_BUS[image["device_type"]][
+            device_bus_list[res - 1]
+        ]
+        click.echo("{} selected".format(highlight_text(image["adapter_type"])))
 
         # Add image details
-        res = AhvObj.images(account_uuid=account_uuid)
-        img_name_uuid_map = {}
-        for entity in res.get("entities", []):
-            img_type = entity["status"]["resources"].get("image_type", None)
-
-            # Ignoring images, if they don't have any image type(Ex: Karbon Image)
-            if not img_type:
-                continue
-
-            if img_type == AhvConstants.IMAGE_TYPES[image["device_type"]]:
-                img_name_uuid_map[entity["status"]["name"]] = entity["metadata"]["uuid"]
+        img_name_uuid_map = images_by_type.get(
+            AhvConstants.IMAGE_TYPES[image["device_type"]], {}
+        )
 
         images = list(img_name_uuid_map.keys())
-        while True:
-            if not images:
-                click.echo("\n{}".format(highlight_text("No image present")))
-                image["name"] = ""
-                break
+        if not images:
+            click.echo("\n{}".format(highlight_text("No image present")))
+            image["name"] = ""
 
+        else:
             click.echo("\nChoose from given images:")
             for ind, name in enumerate(images):
                 click.echo("\t {}. {}".format(str(ind + 1), highlight_text(name)))
 
-            res = click.prompt("\nEnter the index of image", default=1)
-            if (res > len(images)) or (res <= 0):
-                click.echo("Invalid index !!! ")
-
-            else:
-                image["name"] = images[res - 1]
-                click.echo("{} selected".format(highlight_text(image["name"])))
-                break
+            res = _prompt_for_index("Enter the index of image", len(images))
+            image["name"] = images[res - 1]
+            click.echo("{} selected".format(highlight_text(image["name"])))
 
         image["bootable"] = click.prompt("\nIs it bootable(y/n)", default="y")
 
@@ -1530,19 +1549,13 @@ def create_spec(client):
     for index, boot_type in enumerate(boot_types):
         click.echo("\t{}. {}".format(index + 1, highlight_text(boot_type)))
 
-    while True:
-        res = click.prompt("\nEnter the index for Boot Type", default=1)
-        if (res > len(boot_types)) or (res <= 0):
-            click.echo("Invalid index !!! ")
-
-        else:
-            boot_type = AhvConstants.BOOT_TYPES[boot_types[res - 1]]
-            if boot_type == AhvConstants.BOOT_TYPES["UEFI"]:
-                spec["resources"]["boot_config"]["boot_type"] = boot_type
-            elif boot_type == AhvConstants.BOOT_TYPES["UEFI SECURE BOOT"]:
-                spec["resources"]["boot_config"]["boot_type"] = boot_type
-            click.echo("{} selected".format(highlight_text(boot_type)))
-            break
+    res = _prompt_for_index("Enter the index for Boot Type", len(boot_types))
+    boot_type = AhvConstants.BOOT_TYPES[boot_types[res - 1]]
+    if boot_type == AhvConstants.BOOT_TYPES["UEFI"]:
+        spec["resources"]["boot_config"]["boot_type"] = boot_type
+    elif boot_type == AhvConstants.BOOT_TYPES["UEFI SECURE BOOT"]:
+        spec["resources"]["boot_config"]["boot_type"] = boot_type
+    click.echo("{} selected".format(highlight_text(boot_type)))
 
     choice = click.prompt(
         "\n{}(y/n)".format(highlight_text("Want any virtual disks")), default="n"
@@ -1554,42 +1567,27 @@ def create_spec(client):
             vdisk = {}
 
             click.echo("\nChoose from given Device Types: ")
-            device_types = list(AhvConstants.DEVICE_TYPES.keys())
             for index, device_type in enumerate(device_types):
                 click.echo("\t{}. {}".format(index + 1, highlight_text(device_type)))
 
-            while True:
-                res = click.prompt("\nEnter the index for Device Type", default=1)
-                if (res > len(device_types)) or (res <= 0):
-                    click.echo("Invalid index !!! ")
-
-                else:
-                    vdisk["device_type"] = AhvConstants.DEVICE_TYPES[
-                        device_types[res - 1]
-                    ]
-                    click.echo(
-                        "{} selected".format(highlight_text(vdisk["device_type"]))
-                    )
-                    break
+            res = _prompt_for_index(
+                "Enter the index for Device Type", len(device_types)
+            )
+            vdisk["device_type"] = AhvConstants.DEVICE_TYPES[device_types[res - 1]]
+            click.echo("{} selected".format(highlight_text(vdisk["device_type"])))
 
             click.echo("\nChoose from given Device Bus :")
-            device_bus_list = list(AhvConstants.DEVICE_BUS[vdisk["device_type"]].keys())
+            device_bus_list = device_bus_lists[vdisk["device_type"]]
             for index, device_bus in enumerate(device_bus_list):
                 click.echo("\t{}. {}".format(index + 1, highlight_text(device_bus)))
 
-            while True:
-                res = click.prompt("\nEnter the index for Device Bus: ", default=1)
-                if (res > len(device_bus_list)) or (res <= 0):
-                    click.echo("Invalid index !!! ")
-
-                else:
-                    vdisk["adapter_type"] = AhvConstants.DEVICE_BUS[
-                        vdisk["device_type"]
-                    ][device_bus_list[res - 1]]
-                    click.echo(
-                        "{} selected".format(highlight_text(vdisk["adapter_type"]))
-                    )
-                    break
+            res = _prompt_for_index(
+                "Enter the index for Device Bus: ", len(device_bus_list)
+            )
+            vdisk["adapter_type"] = AhvConstants.DEVICE_BUS[vdisk["device_type"]][
+                device_bus_list[res - 1]
+            ]
+            click.echo("{} selected".format(highlight_text(vdisk["adapter_type"])))
 
             path.append("disk_size_mib")
 
@@ -1669,20 +1667,11 @@ def create_spec(client):
 
             spec["resources"]["nic_list"] = []
             while True:
-                nic_config = {}
-                while True:
-                    res = click.prompt("\nEnter the index of subnet's name", default=1)
-                    if (res > len(nics)) or (res <= 0):
-                        click.echo("Invalid index !!!")
-
-                    else:
-                        nic_config = nics[res - 1]
-                        click.echo(
-                            "{} selected".format(
-                                highlight_text(nic_config["status"]["name"])
-                            )
-                        )
-                        break
+                res = _prompt_for_index("Enter the index of subnet's name", len(nics))
+                nic_config = nics[res - 1]
+                click.echo(
+                    "{} selected".format(highlight_text(nic_config["status"]["name"]))
+                )
 
                 # Check for static vlan
                 nic = {}
@@ -1729,14 +1718,11 @@ def create_spec(client):
         for index, scriptType in enumerate(script_types):
             click.echo("\t {}. {}".format(str(index + 1), highlight_text(scriptType)))
 
-        while True:
-            index = click.prompt("\nEnter the index for type of script", default=1)
-            if (index > len(script_types)) or (index <= 0):
-                click.echo("Invalid index !!!")
-            else:
-                script_type = script_types[index - 1]
-                click.echo("{} selected".format(highlight_text(script_type)))
-                break
+        index = _prompt_for_index(
+            "Enter the index for type of script", len(script_types)
+        )
+        script_type = script_types[index - 1]
+        click.echo("{} selected".format(highlight_text(script_type)))
 
         if script_type == "cloud_init":
             option.append("AHV CLOUD INIT Script")
@@ -1758,16 +1744,11 @@ def create_spec(client):
             for index, value in enumerate(install_types):
                 click.echo("\t {}. {}".format(str(index + 1), highlight_text(value)))
 
-            while True:
-                index = click.prompt(
-                    "\nEnter the index for type of installing script", default=1
-                )
-                if (index > len(install_types)) or (index <= 0):
-                    click.echo("Invalid index !!!")
-                else:
-                    install_type = install_types[index - 1]
-                    click.echo("{} selected\n".format(highlight_text(install_type)))
-                    break
+            index = _prompt_for_index(
+                "Enter the index for type of installing script", len(install_types)
+            )
+            install_type = install_types[index - 1]
+            click.echo("{} selected\n".format(highlight_text(install_type)))
 
             script["install_type"] = install_type
 
@@ -1803,32 +1784,63 @@ def create_spec(client):
                 dns_search_path = click.prompt("\nEnter DNS Search Path", default="")
                 credential = click.prompt("\nEnter Credential", default="")
 
-                sysprep_dict.update(
-                    {
-                        "is_domain": True,
-                        "domain": domain,
-                        "dns_ip": dns_ip,
-                        "dns_search_path": dns_search_path,
-                    }
-                )
-
-                if credential:  # Review after CALM-15575 is resolved
-                    sysprep_dict["domain_credential_reference"] = {
-                        "kind": "app_credential",
-                        "name": credential,
-                    }
+                # Single literal; the credential reference is folded in only
+                # when one was entered (review after CALM-15575 is resolved)
+                sysprep_dict = {
+                    **sysprep_dict,
+                    "is_domain": True,
+                    "domain": domain,
+                    "dns_ip": dns_ip,
+                    "dns_search_path": dns_search_path,
+                    **(
+                        {
+                            "domain_credential_reference": {
+                                "kind": "app_credential",
+                                "name": credential,
+                            }
+                        }
+                        if credential
+                        else {}
+                    ),
+                }
 
             spec["resources"]["guest_customization"] = {"sysprep": sysprep_dict}
 
     AhvVmProvider.validate_spec(spec)  # Final validation (Insert some default's value)
     click.echo("\nCreate spec for your AHV VM:\n")
-    click.echo(highlight_text(yaml.dump(spec, default_flow_style=False)))
+    click.echo(
+        highlight_text(yaml.dump(spec, default_flow_style=False, Dumper=_YAML_DUMPER))
+    )
+
+
+# Resolved sub-schemas keyed by (id(root_schema), path, options). The root
+# schema is a provider-class attribute that lives for the whole process, so
+# its id is stable; cached values keep the sub-schema dicts referenced.
+_schema_lookup_cache = {}
+
+# Title -> option-schema maps, one per anyOf list, built on first use
+_anyof_title_maps = {}
+
+
+def _get_anyof_option(schema, title):
+    """returns the anyOf option schema carrying the given title"""
+
+    anyof = schema["anyOf"]
+    title_map = _anyof_title_maps.get(id(anyof))
+    if title_map is None:
+        title_map = {option.get("title"): option for option in anyof}
+        _anyof_title_maps[id(anyof)] = title_map
+    return title_map.get(title)
 
 
 def find_schema(schema, path, option):
     if len(path) == 0:
         return {}
 
+    cache_key = (id(schema), tuple(path), tuple(option))
+    if cache_key in _schema_lookup_cache:
+        return _schema_lookup_cache[cache_key]
+
     indPath = 0
     indOpt = 0
 
@@ -1838,11 +1850,7 @@ def find_schema(schema, path, option):
 
         if schema.get("anyOf") is not None:
 
-            resDict = None
-            for optionDict in schema["anyOf"]:
-                if optionDict.get("title") == option[indOpt]:
-                    resDict = optionDict
-                    break
+            resDict = _get_anyof_option(schema, option[indOpt])
 
             if not resDict:
                 print("Not a valid key")
@@ -1858,6 +1866,7 @@ def find_schema(schema, path, option):
             schema = schema[path[indPath]]
             indPath = indPath + 1
 
+    _schema_lookup_cache[cache_key] = schema
     return schema
 
 
@@ -1867,25 +1876,38 @@ def validate_field(schema, path, options, spec):
     return StrictDraft7Validator(keySchema).is_valid(spec)
 
 
-def get_field(schema, path, options, type=str, default=None, msg=None):
+# Splits camel-case words when deriving a prompt label from a field name
+_CAMEL_RE = re.compile(r"(?<=\w)([A-Z])")
+
+
+@lru_cache(maxsize=256)
+def _humanize_field(field):
+    """turns a schema field name into a readable prompt label"""
 
-    field = path[-1]
     field = field.replace("_", " ")
-    field = re.sub(r"(?<=\w)([A-Z])", r" \1", field)
-    field = field.capitalize()
+    field = _CAMEL_RE.sub(r" \1", field)
+    return field.capitalize()
+
+
+def get_field(schema, path, options, type=str, default=None, msg=None):
+
+    field = _humanize_field(path[-1])
 
     if msg is None:
         msg = "Enter {}".format(field)
 
+    # Resolve the field schema and build its validator once; only the
+    # entered data changes across retries
+    field_validator = StrictDraft7Validator(find_schema(schema, path, options))
+
     data = ""
     while True:
-        if not default:
-            data = click.prompt(msg, type=type)
-
-        else:
-            data = click.prompt(msg, default=default)
+        # With a default, click infers the value type from it as before
+        data = click.prompt(
+            msg, type=None if default else type, default=default or None
+        )
 
-        if not validate_field(schema, path, options, data):
+        if not field_validator.is_valid(data):
             click.echo("data incorrect. Enter again")
 
         else:
@@ -122,6 +122,39 @@ class Cache:
 
         return res
 
+    @classmethod
+    def get_entities_data_using_uuids(cls, entity_type, uuids):
+        """returns a uuid to entity data map for supplied uuids using one query"""
+
+        uuids = set(uuids)
+        if not uuids:
+            return {}
+
+        db_cls = cls.get_entity_db_table_object(entity_type)
+
+        try:
+            res = {
+                entity.uuid: entity.get_detail_dict()
+                for entity in db_cls.select().where(db_cls.uuid.in_(list(uuids)))
+            }
+        except OperationalError:
+            formatted_exc = traceback.format_exc()
+            LOG.debug("Exception Traceback:\n{}".format(formatted_exc))
+            LOG.error(
+                "Cache error occurred. Please update cache using 'calm update cache' command"
+            )
+            sys.exit(-1)
+
+        missing_uuids = uuids - set(res)
+        if missing_uuids:
+            LOG.debug(
+                "Unsuccessful db query from {} table for following uuids {}".format(
+                    entity_type, missing_uuids
+                )
+            )
+
+        return res
+
     @classmethod
     def get_entity_db_table_object(cls, entity_type):
         """returns database entity table object corresponding to entity"""